@@ -6,8 +6,16 @@ Supported instruments (identified):
 - 
 """
 
+import os
+import sys
 from numpy import zeros,ones,linspace
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 
 class Driver():
     
@@ -51,10 +59,7 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR',**kwargs):
-        import visa
-        
-        rm = visa.ResourceManager()
-        self.inst = rm.get_instrument(address)
+        self.inst = open_resource(address)
         
         Driver.__init__(self)
         
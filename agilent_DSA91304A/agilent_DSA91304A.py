@@ -7,7 +7,18 @@ Supported instruments (identified):
 """
 
 import os
-from numpy import frombuffer,int8,ndarray
+import sys
+from numpy import frombuffer,int8,float32,float64,ndarray,save,vstack,empty,tile
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace
+from driver_tools.ieee_block import block_payload, block_payloads
+from driver_tools.infiniium import DTYPES, Preamble
+from driver_tools.streaming import StreamAcquisition
+from driver_tools.async_transport import AsyncConnection, AsyncVXI11Transport
 
 
 class Driver():
@@ -16,6 +27,11 @@ class Driver():
               
         self.nb_channels = int(nb_channels)
         self.type        = 'BYTE'
+        self._settings_version = 0  # incremented when cached preambles become invalid
+        self._active_channels  = None
+        self.data_channels     = None
+        self.channels_acquired = []
+        self.stream            = None
         
         self.write(':WAVeform:TYPE RAW')
         self.write(':WAVEFORM:BYTEORDER LSBFirst')
@@ -28,13 +44,51 @@ class Driver():
     
     ### User utilities
     def get_data_channels(self,channels=[]):
-        """Get all channels or the ones specified"""
+        """Get all active channels or the ones specified in a single round trip.
+        Returns a (nb_channels, nb_points) array that is reused by the next call
+        (in volts with the ASCII encoding, raw samples otherwise)"""
+        active_channels = self.get_active_channels()
+        if channels == []: channels = active_channels
+        channels = [int(i) for i in channels]
+        inactive_channels = [i for i in channels if i not in active_channels]
+        if inactive_channels:
+            raise ValueError(f"Channels {inactive_channels} are not active (active channels: {active_channels})")
+        self.channels_acquired = channels
         self.stop()
-        if channels == []: channels = list(range(1,self.nb_channels+1))
-        for i in channels:
-            getattr(self,f'channel{i}').get_data_raw()
-            getattr(self,f'channel{i}').get_log_data()
+        if channels == []:
+            self.data_channels = empty((0,0),DTYPES.get(self.type,float64))
+            self.run()
+            return self.data_channels
+        if self.type == "ASCII":
+            traces = []
+            for i in channels:
+                traces.append(parse_trace(getattr(self,f'channel{i}')._get_data_block()))
+                getattr(self,f'channel{i}').get_preamble()
+            self.data_channels = vstack(traces)
+            self.run()
+            return self.data_channels
+        
+        self.write(';'.join(f':WAVEFORM:SOURCE CHAN{i};:WAV:DATA?' for i in channels))
+        payloads = block_payloads(self.read_raw(),len(channels))
+        dtype = DTYPES[self.type]
+        shape = (len(channels),len(payloads[0])//dtype.itemsize)
+        if self.data_channels is None or self.data_channels.shape != shape or self.data_channels.dtype != dtype:
+            self.data_channels = empty(shape,dtype)
+        for row,i,payload in zip(self.data_channels,channels,payloads):
+            row[:] = frombuffer(payload,dtype)
+            getattr(self,f'channel{i}').data_raw = row
+            getattr(self,f'channel{i}').get_preamble()
         self.run()
+        return self.data_channels
+    
+    def get_active_channels(self):
+        """Return the displayed channels, only queried once per session"""
+        if self._active_channels is None:
+            self._active_channels = [i for i in range(1,self.nb_channels+1) if getattr(self,f'channel{i}').is_active()]
+        return self._active_channels
+    def refresh_active_channels(self):
+        """Query again the displayed channels at next acquisition"""
+        self._active_channels = None
         
     def save_data_channels(self,filename,channels=[],FORCE=False):
         if channels == []: channels = list(range(1,self.nb_channels+1))
@@ -49,6 +103,40 @@ class Driver():
         self.write(':STOP')
     def single(self):
         self.write('SINGLE')
+
+    ### Streaming
+    def start_stream(self,channels=[],capacity=64,consumer=None,nb_frames=None,drop_oldest=True):
+        """Acquire get_data_channels frames continuously in a background thread.
+        Frames are kept in a ring buffer of the given capacity, and handed to consumer(frame, index) if provided.
+        When the buffer is full the oldest frame is dropped, or the acquisition waits if drop_oldest is False.
+        Don't use the driver from another thread while streaming"""
+        self.stop_stream()
+        self.stream = StreamAcquisition(lambda: self.get_data_channels(channels),capacity,consumer,nb_frames,drop_oldest)
+        self.stream.start()
+    def stop_stream(self):
+        if self.stream is not None:
+            self.stream.stop()
+    def get_stream_frames(self):
+        """Return all frames pending in the stream buffer, oldest first"""
+        return self.stream.buffer.get_all()
+    def get_stream_fps(self):
+        return self.stream.get_fps() if self.stream is not None else 0.
+    def get_stream_dropped(self):
+        return self.stream.get_dropped() if self.stream is not None else 0
+
+    ### Segmented memory
+    def set_segments_count(self,val):
+        """Set the number of segments acquired in segmented mode (1 to disable it)"""
+        val = int(val)
+        if val > 1:
+            self.write(':ACQUIRE:MODE SEGMENTED')
+            self.write(f':ACQUIRE:SEGMENTED:COUNT {val}')
+        else:
+            self.write(':ACQUIRE:MODE RTIME')
+        self.clear_preamble()
+    def get_segments_count(self):
+        """Return the number of segments acquired"""
+        return int(float(self.query(':WAVEFORM:SEGMENTED:COUNT?')))
     def reset(self):
         self.sock.local()
         self.sock.clear()
@@ -59,18 +147,30 @@ class Driver():
         return self.read()
 
     def set_type(self,val):
-        """Argument type must be a string (BYTE or ASCII)"""
+        """Argument type must be a string (BYTE, WORD or ASCII)"""
         self.type = val
         self.write(f':WAVEFORM:FORMAT {self.type}')
+        self.clear_preamble()
     def get_type(self):
         return self.type
+
+    def clear_preamble(self):
+        """Make channels query their preamble again, to be used after changing a setting from the front panel"""
+        self._settings_version += 1
     
     
     def get_driver_model(self):
         model = []
         for i in range(1,self.nb_channels+1):
             model.append({'element':'module','name':f'channel{i}','object':getattr(self,f'channel{i}'), 'help':'Channels'})
-        model.append({'element':'variable','name':'encoding','write':self.set_type,'read':self.get_type, 'type':str,'help':'Set the data encoding too use. Accepted values are: BYTE, ASCII. Default value is BYTE'})
+        model.append({'element':'variable','name':'encoding','write':self.set_type,'read':self.get_type, 'type':str,'help':'Set the data encoding too use. Accepted values are: BYTE, WORD, ASCII. Default value is BYTE'})
+        model.append({'element':'action','name':'clear_preamble','do':self.clear_preamble,'help':'Query the channels preamble again at next numerical read (use it after changing settings on the scope)'})
+        model.append({'element':'action','name':'refresh_active_channels','do':self.refresh_active_channels,'help':'Query again the displayed channels at next acquisition'})
+        model.append({'element':'variable','name':'segments_count','write':self.set_segments_count,'read':self.get_segments_count,'type':int,'help':'Set the number of segments acquired in segmented mode (1 to disable it)'})
+        model.append({'element':'action','name':'start_stream','do':self.start_stream,'help':'Acquire all active channels continuously in a background thread'})
+        model.append({'element':'action','name':'stop_stream','do':self.stop_stream,'help':'Stop the continuous acquisition'})
+        model.append({'element':'variable','name':'stream_fps','read':self.get_stream_fps,'type':float,'help':'Frames per second acquired by the continuous acquisition'})
+        model.append({'element':'variable','name':'stream_dropped','read':self.get_stream_dropped,'type':int,'help':'Frames overwritten in the stream buffer before being read'})
         model.append({'element':'action','name':'stop','do':self.stop,'help':'Set stop mode for trigger'})
         model.append({'element':'action','name':'run','do':self.run,'help':'Set run mode for trigger'})
         model.append({'element':'action','name':'single','do':self.single,'help':'Set single mode for trigger'})
@@ -87,14 +187,28 @@ class Driver_VXI11(Driver):
         Driver.__init__(self, **kwargs)
     
     def read_raw(self):
-        self.sock.read_raw()
+        return self.sock.read_raw()
     def write(self,string):
         "Take a sting and write it to the scope"
         self.sock.write(string)
     def read(self):
         return self.sock.read()
+    def query(self,string):
+        self.sock.write(string)
+        return self.sock.read()
     def close(self):
+        self.stop_stream()
         self.sock.close()
+
+class Driver_ASYNC_VXI11(AsyncConnection, Driver):
+    """Driver_VXI11 run on the shared asyncio loop: awrite/aread/aquery can be awaited to poll many instruments concurrently"""
+    def __init__(self, address='192.168.0.14', **kwargs):
+        AsyncConnection.__init__(self, AsyncVXI11Transport(address))
+        Driver.__init__(self, **kwargs)
+
+    def close(self):
+        self.stop_stream()
+        AsyncConnection.close(self)
 ############################## Connections classes ##############################
 #################################################################################
 
@@ -103,21 +217,33 @@ class Channel():
     def __init__(self,dev,channel):
         self.channel = int(channel)
         self.dev     = dev
+        self._preamble = None
+        self._preamble_version = None
         
-    def get_data_raw(self):
+    def _get_data_block(self):
+        """Query the trace and return a zero-copy view on the block payload"""
         self.dev.write(f':WAVEFORM:SOURCE CHAN{self.channel}')
         self.dev.write(':WAV:DATA?')
         self.data_raw = self.dev.read_raw()
-        if self.dev.type == "BYTE":
-            self.data_raw = self.data_raw[10:]
+        if self.dev.type != "ASCII":
+            self.data_raw = block_payload(self.data_raw)
         return self.data_raw
+    def get_data_raw(self):
+        return bytes(self._get_data_block())
     def get_log_data(self):
         self.dev.write(f':WAVEFORM:SOURCE CHAN{self.channel}')
         self.dev.write(f':WAVEFORM:PREAMBLE?')
         self.log_data = self.dev.read()
+        self._preamble = Preamble(self.log_data)
+        self._preamble_version = self.dev._settings_version
         return self.log_data
+    def get_preamble(self):
+        """Return the parsed preamble, only queried again once a setting changed"""
+        if self._preamble is None or self._preamble_version != self.dev._settings_version:
+            self.get_log_data()
+        return self._preamble
     def get_data(self):
-        return frombuffer(self.get_data_raw(),int8)
+        return frombuffer(self._get_data_block(),DTYPES.get(self.dev.type,int8))
         
     def save_data_raw(self,filename,FORCE=False):
         temp_filename = f'{filename}_DSA91304ACH{self.channel}'
@@ -137,14 +263,55 @@ class Channel():
         f.close()
     
     def get_data_numerical(self):
-        return array_of_float
-    def save_data_numerical(self):
-        return array_of_float
+        """Return the current trace in volts (float32)"""
+        if self.dev.type == "ASCII":
+            self.data_numerical = parse_trace(self._get_data_block(),dtype=float32)
+            return self.data_numerical
+        data = frombuffer(self._get_data_block(),DTYPES[self.dev.type])
+        preamble = self.get_preamble()
+        if preamble.points == 0 or len(data) % preamble.points != 0:  # acquisition settings changed behind our back
+            self._preamble = None
+            preamble = self.get_preamble()
+        self.data_numerical = preamble.to_volts(data)
+        return self.data_numerical
+    def get_time(self):
+        """Return the time axis of the trace, only rebuilt when the preamble changes"""
+        return self.get_preamble().time()
+    def get_segments(self):
+        """Return all acquired segments as a (nb_segments, nb_points) view over a single read (in volts with the ASCII encoding)"""
+        nb_segments = max(self.dev.get_segments_count(),1)
+        if self.dev.type == "ASCII":
+            data = parse_trace(self._get_data_block())
+        else:
+            data = self.get_data()
+        if len(data) % nb_segments != 0:
+            raise ValueError(f"Trace of {len(data)} points can't be split in {nb_segments} segments")
+        self.segments = data.reshape(nb_segments,-1)
+        return self.segments
+    def get_segments_time(self):
+        """Return the trigger time tag of each segment, in seconds"""
+        self.segments_time = parse_trace(self.dev.query(':WAVEFORM:SEGMENTED:XLIST? TTAG'))
+        return self.segments_time
+    def is_active(self):
+        return bool(float(self.dev.query(f':CHANNEL{self.channel}:DISPLAY?')))
+    def save_data_numerical(self,filename,FORCE=False):
+        temp_filename = f'{filename}_DSA91304ACH{self.channel}.npy'
+        if os.path.exists(os.path.join(os.getcwd(),temp_filename)) and not(FORCE):
+            print('\nFile ', temp_filename, ' already exists, change filename or remove old file\n')
+            return
+        time_axis = self.get_time()
+        if len(time_axis) and len(self.data_numerical) > len(time_axis) and len(self.data_numerical) % len(time_axis) == 0:
+            time_axis = tile(time_axis,len(self.data_numerical)//len(time_axis))  # segmented acquisition: time relative to each segment
+        save(temp_filename,vstack((time_axis[:len(self.data_numerical)],self.data_numerical)))
 
 
     def get_driver_model(self):
         model = []
         model.append({'element':'variable','name':'trace_raw','type':bytes,'read':self.get_data_raw,'help':'Get the current trace in bytes'})
         model.append({'element':'variable','name':'trace','type':ndarray,'read':self.get_data,'help':'Get the current trace in a numpy array of integers'})
+        model.append({'element':'variable','name':'trace_numerical','type':ndarray,'read':self.get_data_numerical,'help':'Get the current trace in volts'})
+        model.append({'element':'variable','name':'time','type':ndarray,'read':self.get_time,'help':'Get the time axis of the current trace in seconds'})
+        model.append({'element':'variable','name':'segments','type':ndarray,'read':self.get_segments,'help':'Get all acquired segments in a 2D numpy array of integers (one row per segment)'})
+        model.append({'element':'variable','name':'segments_time','type':ndarray,'read':self.get_segments_time,'help':'Get the trigger time tag of each segment in seconds'})
         return model
 
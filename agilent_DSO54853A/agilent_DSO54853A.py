@@ -7,8 +7,18 @@ Supported instruments (identified):
 """
 
 import os
+import sys
 import time
-from numpy import frombuffer,int8,ndarray
+from numpy import frombuffer,int8,float32,ndarray,save,vstack
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace
+from driver_tools.ieee_block import block_payload
+from driver_tools.infiniium import DTYPES, Preamble
+from driver_tools.async_transport import AsyncConnection, AsyncVXI11Transport
 
 
 class Driver():
@@ -17,6 +27,7 @@ class Driver():
               
         self.nb_channels = int(nb_channels)
         self.type        = 'BYTE'
+        self._settings_version = 0  # incremented when cached preambles become invalid
         
         self.write(':WAVeform:TYPE RAW')
         self.write(':WAVEFORM:BYTEORDER LSBFirst')
@@ -34,7 +45,7 @@ class Driver():
         self.stop()
         if channels == []: channels = list(range(1,self.nb_channels+1))
         for i in channels:
-            getattr(self,f'channel{i}').get_data_raw()
+            getattr(self,f'channel{i}')._get_data_block()
             getattr(self,f'channel{i}').get_log_data()
         self.run()
         
@@ -53,18 +64,24 @@ class Driver():
         self.write(':SINGLE')
         
     def set_type(self,val):
-        """Argument type must be a string (BYTE or ASCII)"""
+        """Argument type must be a string (BYTE, WORD or ASCII)"""
         self.type = val
         self.write(f':WAVEFORM:FORMAT {self.type}')
+        self.clear_preamble()
     def get_type(self):
         return self.type
 
+    def clear_preamble(self):
+        """Make channels query their preamble again, to be used after changing a setting from the front panel"""
+        self._settings_version += 1
+
 
     def get_driver_model(self):
         model = []
         for i in range(1,self.nb_channels+1):
             model.append({'element':'module','name':f'channel{i}','object':getattr(self,f'channel{i}'), 'help':'Channels'})
-        model.append({'element':'variable','name':'encoding','write':self.set_type,'read':self.get_type, 'type':str,'help':'Set the data encoding too use. Accepted values are: BYTE, ASCII. Default value is BYTE'})
+        model.append({'element':'variable','name':'encoding','write':self.set_type,'read':self.get_type, 'type':str,'help':'Set the data encoding too use. Accepted values are: BYTE, WORD, ASCII. Default value is BYTE'})
+        model.append({'element':'action','name':'clear_preamble','do':self.clear_preamble,'help':'Query the channels preamble again at next numerical read (use it after changing settings on the scope)'})
         model.append({'element':'action','name':'stop','do':self.stop,'help':'Set stop mode for trigger'})
         model.append({'element':'action','name':'run','do':self.run,'help':'Set run mode for trigger'})
         model.append({'element':'action','name':'single','do':self.single,'help':'Set single mode for trigger'})
@@ -89,6 +106,12 @@ class Driver_VXI11(Driver):
         self.inst.write(cmd)
     def close(self):
         self.inst.close()
+
+class Driver_ASYNC_VXI11(AsyncConnection, Driver):
+    """Driver_VXI11 run on the shared asyncio loop: awrite/aread/aquery can be awaited to poll many instruments concurrently"""
+    def __init__(self, address='192.168.0.1', **kwargs):
+        AsyncConnection.__init__(self, AsyncVXI11Transport(address))
+        Driver.__init__(self, **kwargs)
 ############################## Connections classes ##############################
 #################################################################################
 
@@ -96,23 +119,34 @@ class Channel():
     def __init__(self,dev,channel):
         self.channel = int(channel)
         self.dev  = dev
+        self._preamble = None
+        self._preamble_version = None
     
         
-    def get_data_raw(self):
+    def _get_data_block(self):
+        """Query the trace and return a zero-copy view on the block payload"""
         self.dev.write(f':WAVEFORM:SOURCE CHAN{self.channel}')
         self.dev.write(':WAV:DATA?')
         self.data_raw = self.dev.read_raw()
-        if typ=='BYTE':
-            self.data_raw = self.data_raw[8:]
-        self.data_raw = self.data_raw[:-1]
+        if self.dev.type != "ASCII":
+            self.data_raw = block_payload(self.data_raw)
         return self.data_raw
+    def get_data_raw(self):
+        return bytes(self._get_data_block())
     def get_log_data(self):
         self.dev.write(f':WAVEFORM:SOURCE CHAN{self.channel}')
         self.dev.write(f':WAVEFORM:PREAMBLE?')
         self.log_data = self.dev.read()
+        self._preamble = Preamble(self.log_data)
+        self._preamble_version = self.dev._settings_version
         return self.log_data
+    def get_preamble(self):
+        """Return the parsed preamble, only queried again once a setting changed"""
+        if self._preamble is None or self._preamble_version != self.dev._settings_version:
+            self.get_log_data()
+        return self._preamble
     def get_data(self):
-        return frombuffer(self.get_data_raw(),int8)
+        return frombuffer(self._get_data_block(),DTYPES.get(self.dev.type,int8))
         
     def save_data_raw(self,filename,FORCE=False):
         temp_filename = f'{filename}_DSO54853ACH{self.channel}'
@@ -132,13 +166,32 @@ class Channel():
         f.close()
         
     def get_data_numerical(self):
-        return array_of_float
-    def save_data_numerical(self):
-        return array_of_float
+        """Return the current trace in volts (float32)"""
+        if self.dev.type == "ASCII":
+            self.data_numerical = parse_trace(self._get_data_block(),dtype=float32)
+            return self.data_numerical
+        data = frombuffer(self._get_data_block(),DTYPES[self.dev.type])
+        preamble = self.get_preamble()
+        if preamble.points == 0 or len(data) % preamble.points != 0:  # acquisition settings changed behind our back
+            self._preamble = None
+            preamble = self.get_preamble()
+        self.data_numerical = preamble.to_volts(data)
+        return self.data_numerical
+    def get_time(self):
+        """Return the time axis of the trace, only rebuilt when the preamble changes"""
+        return self.get_preamble().time()
+    def save_data_numerical(self,filename,FORCE=False):
+        temp_filename = f'{filename}_DSO54853ACH{self.channel}.npy'
+        if os.path.exists(os.path.join(os.getcwd(),temp_filename)) and not(FORCE):
+            print('\nFile ', temp_filename, ' already exists, change filename or remove old file\n')
+            return
+        save(temp_filename,vstack((self.get_time()[:len(self.data_numerical)],self.data_numerical)))
 
 
     def get_driver_model(self):
         model = []
         model.append({'element':'variable','name':'trace_raw','type':bytes,'read':self.get_data_raw,'help':'Get the current trace in bytes'})
         model.append({'element':'variable','name':'trace','type':ndarray,'read':self.get_data,'help':'Get the current trace in a numpy array of integers'})
+        model.append({'element':'variable','name':'trace_numerical','type':ndarray,'read':self.get_data_numerical,'help':'Get the current trace in volts'})
+        model.append({'element':'variable','name':'time','type':ndarray,'read':self.get_time,'help':'Get the time axis of the current trace in seconds'})
         return model
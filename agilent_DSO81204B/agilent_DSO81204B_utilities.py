@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
+
 category = 'Oscilloscope'
     
 class Driver_parser():
@@ -52,17 +54,28 @@ usage:    autolab driver [options] args
         if args.trigger:
             getattr(self.Instance,'single')()
         if args.measure:
-            for i in range(args.measure):
-                getattr(self.Instance,'stop')()
-                print(str(i+1))
-                getattr(self.Instance,'get_data_channels')(channels=args.channels.split(','))
-                getattr(self.Instance,'save_data_channels')(filename=str(i+1),channels=args.channels.split(','),FORCE=args.force)
-                getattr(self.Instance,'run')()
-                time.sleep(0.050)
+            if getattr(self.Instance,'get_type')().upper() == 'ASCII':
+                raise ValueError('--measure saves binary frames: use the BYTE or WORD format')
+            self.force = args.force
+            getattr(self.Instance,'start_stream')(channels=args.channels.split(','),consumer=self.save_frame,nb_frames=int(args.measure),drop_oldest=False)
+            self.Instance.stream.join()
+            if self.Instance.stream.error: raise self.Instance.stream.error
+            print(f'{self.Instance.stream.frames_consumed} frames saved at {self.Instance.get_stream_fps():.2f} fps, {self.Instance.get_stream_dropped()} dropped')
         elif args.filename:
             getattr(self.Instance,'get_data_channels')(channels=args.channels.split(','))
             getattr(self.Instance,'save_data_channels')(filename=args.filename,channels=args.channels.split(','),FORCE=args.force)
   
 
+    def save_frame(self,frame,index):
+        """Stream consumer: save one frame with the same files as save_data_channels"""
+        print(str(index+1))
+        for row,channel in zip(frame,self.Instance.channels_acquired):
+            temp_filename = f'{index+1}_DSO81204BCH{channel}'
+            if os.path.exists(os.path.join(os.getcwd(),temp_filename)) and not(self.force):
+                print('\nFile ', temp_filename, ' already exists, change filename or remove old file\n')
+                continue
+            row.tofile(temp_filename)
+            getattr(self.Instance,f'channel{channel}').save_log_data(filename=str(index+1),FORCE=self.force)
+
     def exit(self):
         self.Instance.close()
@@ -7,9 +7,17 @@ Supported instruments (identified):
 """
 
 import os
+import sys
 from numpy import savetxt,linspace
 import pandas
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace
+from driver_tools.async_transport import AsyncConnection, AsyncVXI11Transport
+
 category = 'Electrical Spectrum Analyser (ESA)'
 
 
@@ -68,15 +76,21 @@ class Driver_VXI11(Driver):
         Driver.__init__(self, **kwargs)
 
     def write(self, msg):
-        self.sock.write(msg)
+        self.inst.write(msg)
     def read(self):
-        return self.sock.read()
+        return self.inst.read()
     def query(self,msg):
         """Sends question and returns answer"""
         self.write(msg)
         return(self.read())
     def close(self):
         self.inst.close()
+
+class Driver_ASYNC_VXI11(AsyncConnection, Driver):
+    """Driver_VXI11 run on the shared asyncio loop: awrite/aread/aquery can be awaited to poll many instruments concurrently"""
+    def __init__(self, address='192.168.0.14', **kwargs):
+        AsyncConnection.__init__(self, AsyncVXI11Transport(address))
+        Driver.__init__(self, **kwargs)
 ############################## Connections classes ##############################
 #################################################################################
 
@@ -88,7 +102,7 @@ class Traces():
         self.data_dict = {}
         
     def get_data(self):
-        self.data        = eval(self.dev.query(f"TRAC:DATA? TRACE{self.trace}"))
+        self.data        = parse_trace(self.dev.query(f"TRAC:DATA? TRACE{self.trace}"))
         self.frequencies = self.get_frequencies(self.data)
         return self.frequencies,self.data
     def get_data_dataframe(self):
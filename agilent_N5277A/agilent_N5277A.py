@@ -6,8 +6,16 @@ Supported instruments (identified): N5277A
 """
 
 import os
+import sys
 import time
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools import scpi_batch
+from driver_tools.visa_pool import open_resource
+
 
 class Driver:
     r"""
@@ -45,6 +53,10 @@ class Driver:
     def opc(self):
         self.query("*OPC?")  # stop the controller until all commands in the device queue are executed
 
+    def batch(self, opc=True):
+        """ with dev.batch(): the writes are sent as a single message followed by a single *OPC? """
+        return scpi_batch.batch(self, opc=opc)
+
     def clear(self):
         self.write("*CLS")  # clear status
 
@@ -62,19 +74,20 @@ class Driver:
         self.wait()
 
     def config2(self):  # can use mutiple wwindows but stay with 1 for now
-        self.preset()
-        self.write("CALCulate1:PARameter:DEFine:EXT 'Meas1','S11'")
-        self.write("CALCulate2:PARameter:DEFine:EXT 'Meas2','S21'")
-        self.write("DISPlay:WINDow1:STATE ON")
-        self.write("DISPlay:WINDow2:STATE ON")
-        self.write("DISPlay:WINDow1:TRACe1:FEED 'Meas1'")
-        self.write("DISPlay:WINDow2:TRACe2:FEED 'Meas2'")
-        self.write("SENSe1:FREQuency:SPAN 1e9")
-        self.write("SENSe2:FREQuency:SPAN 2e9")
-        self.write("CALCulate1:PARameter:SELect 'Meas1'")
-        self.write("CALCulate2:PARameter:SELect 'Meas2'")
-        self.write("CALCulate1:MARKer:STATe ON")
-        self.write("CALCulate2:MARKer:STATE ON")
+        with self.batch():
+            self.preset()
+            self.write("CALCulate1:PARameter:DEFine:EXT 'Meas1','S11'")
+            self.write("CALCulate2:PARameter:DEFine:EXT 'Meas2','S21'")
+            self.write("DISPlay:WINDow1:STATE ON")
+            self.write("DISPlay:WINDow2:STATE ON")
+            self.write("DISPlay:WINDow1:TRACe1:FEED 'Meas1'")
+            self.write("DISPlay:WINDow2:TRACe2:FEED 'Meas2'")
+            self.write("SENSe1:FREQuency:SPAN 1e9")
+            self.write("SENSe2:FREQuency:SPAN 2e9")
+            self.write("CALCulate1:PARameter:SELect 'Meas1'")
+            self.write("CALCulate2:PARameter:SELect 'Meas2'")
+            self.write("CALCulate1:MARKer:STATe ON")
+            self.write("CALCulate2:MARKer:STATE ON")
 
 
     def get_timeout(self):
@@ -88,6 +101,7 @@ class Driver:
     ## PRESET ##
     def preset(self):
         self.write("SYST:FPReset")
+        self.data.clear_cache()
 
 
     def get_driver_model(self):
@@ -121,10 +135,7 @@ class Driver:
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self,address='GPIB0::16::INSTR', **kwargs):
-        import pyvisa as visa
-
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
 
         # self.TIMEOUT = 5000 #ms
         # self.controller.timeout = self.TIMEOUT
@@ -137,6 +148,21 @@ class Driver_VISA(Driver):
     def query(self,command):
         return self.controller.query(command).strip('\n')
 
+    def query_blocks(self,command,count=1):
+        """ Send command and read the count IEEE-488.2 blocks of the answer.
+        Each payload is read with the exact length announced by its header,
+        so bytes equal to the read termination inside it don't end the read """
+        self.controller.write(command)
+        payloads = []
+        for _ in range(count):
+            header = self.controller.read_bytes(2)
+            if header[:1] != b'#' or not header[1:2].isdigit() or header[1:2] == b'0':
+                raise ValueError(f"Expected a definite length IEEE-488.2 block, received {header}")
+            length = int(self.controller.read_bytes(int(header[1:2])))
+            payloads.append(self.controller.read_bytes(length))
+            self.controller.read_bytes(1)  # ';' between the answers, read termination after the last one
+        return payloads
+
     def write(self,command):
         self.controller.write(command)
 ############################## Connections classes ##############################
@@ -569,6 +595,7 @@ class Sweep:
 
         self.query = dev.query
         self.write = dev.write
+        self.clear_cache = dev.data.clear_cache  # the stimulus axis depends on the sweep settings
 
 
     def get_sweep_time(self):
@@ -585,6 +612,7 @@ class Sweep:
     def set_nbpts(self, value):
         value = int(value)
         self.write(f"SENSe1:SWEep:POINts {value}")
+        self.clear_cache()
 
 
     def get_sweep_type(self):
@@ -593,6 +621,7 @@ class Sweep:
     def set_sweep_type(self, value):
         value = str(value)
         self.write(f"SENSe1:SWEep:TYPE {value}")
+        self.clear_cache()
 
 
     def get_sweep_time_auto(self):
@@ -634,6 +663,7 @@ class Frequency:
 
         self.query = dev.query
         self.write = dev.write
+        self.clear_cache = dev.data.clear_cache  # the stimulus axis depends on the sweep settings
 
 
     def get_frequency_start(self):
@@ -642,6 +672,7 @@ class Frequency:
     def set_frequency_start(self, value):
         value = float(value)
         self.write(f"SENS:FREQ:STAR {value}")
+        self.clear_cache()
 
 
     def get_frequency_stop(self):
@@ -650,6 +681,7 @@ class Frequency:
     def set_frequency_stop(self, value):
         value = float(value)
         self.write(f"SENS:FREQ:STOP {value}")
+        self.clear_cache()
 
 
     def get_frequency_center(self):
@@ -658,6 +690,7 @@ class Frequency:
     def set_frequency_center(self, value):
         value = float(value)
         self.write(f"SENSe1:FREQuency:CENTer {value}")
+        self.clear_cache()
 
 
     def get_frequency_span(self):
@@ -666,6 +699,7 @@ class Frequency:
     def set_frequency_span(self, value):
         value = float(value)
         self.write(f"SENSe1:FREQuency:SPAN {value}")
+        self.clear_cache()
 
 
     def get_frequency(self):
@@ -674,6 +708,7 @@ class Frequency:
     def set_frequency(self, value):
         value = float(value)
         self.write(f"SENS:FREQ:CW {value}")
+        self.clear_cache()
 
 
     def get_step(self):
@@ -682,6 +717,7 @@ class Frequency:
     def set_step(self, value):
         value = float(value)
         self.write(f"SENS:SWEep:STEP {value}")
+        self.clear_cache()
 
 
     def get_driver_model(self):
@@ -821,20 +857,59 @@ class Average:
 
 class Data:
 
+    # binary transfer of the arrays: little-endian float64, back to ASCII afterwards for the other queries
+    BINARY_FORMAT = "FORM:DATA REAL,64;:FORM:BORD SWAP"
+    ASCII_FORMAT = "FORM:DATA ASC,0"
+
     def __init__(self, dev):
 
         import numpy as np
         self.np = np
 
         self.query = dev.query
+        self.query_blocks = dev.query_blocks
         self.write = dev.write
         self._time_state = True
+        self._x = None
+
+
+    def _query_arrays(self, commands):
+        """ Send the queries in a single message with the binary format and
+        return one float64 array per query """
+        message = ";:".join([self.BINARY_FORMAT] + list(commands))
+        try:
+            payloads = self.query_blocks(message, len(commands))
+        finally:
+            self.write(self.ASCII_FORMAT)
+        return [self.np.frombuffer(payload, "<f8") for payload in payloads]
+
+    def clear_cache(self):
+        """ Forget the stimulus axis, fetched again on next use """
+        self._x = None
 
 
     def get_data(self):
-        data = self.query("CALCulate1:DATA? FDATA").split(",")
-        data = [float(i) for i in data]
-        return self.np.array(data)
+        return self._query_arrays(["CALCulate1:DATA? FDATA"])[0].copy()
+
+    def get_x(self):
+        """ Stimulus axis (Hz for a frequency sweep), kept until a sweep setting is changed """
+        if self._x is None:
+            self._x = self._query_arrays(["CALCulate1:X?"])[0]
+            self._x.setflags(write=False)  # shared by all the callers: can't be modified in place
+        return self._x
+
+    def get_measurement_numbers(self):
+        catalog = self.query("SYSTem:MEASurement:CATalog? 1").strip().strip('"')
+        return [int(i) for i in catalog.split(",") if i.strip()]
+
+    def get_sdata(self):
+        """ Complex data of all the measurements of channel 1 (S11, S21, S41...)
+        in a single transfer: one row per measurement """
+        numbers = self.get_measurement_numbers()
+        if not numbers:
+            return self.np.empty((0, 0), complex)
+        arrays = self._query_arrays([f"CALCulate1:MEASure{i}:DATA:SDATA?" for i in numbers])
+        return self.np.vstack(arrays).view(complex)
 
     def save_data_remote(self, filename):  # (save data in "c:\users\public\documents\Network analyzer" by default)
         filename = self.formated_filename(str(filename), ".csv")
@@ -873,6 +948,7 @@ class Data:
     def load_file(self, filename):
         filename = str(filename)
         self.write(f"MMEM:LOAD '{filename}'")
+        self.clear_cache()
 
     def get_default_dir(self):
         return str(self.query("MMEMory:CDIRectory?").strip('"'))
@@ -930,6 +1006,12 @@ class Data:
         model.append({'element':'variable','name':'data','unit':'dBm',
                       'read':self.get_data,
                       'type':self.np.ndarray,'help':'Get the power array of the displayed trace (dBm)'})
+        model.append({'element':'variable','name':'frequency',
+                      'read':self.get_x,
+                      'type':self.np.ndarray,'help':'Get the stimulus array of the sweep (Hz for a frequency sweep)'})
+        model.append({'element':'variable','name':'sdata',
+                      'read':self.get_sdata,
+                      'type':self.np.ndarray,'help':'Get the complex data of all the measurements of the channel 1, one row per measurement'})
         model.append({'element':'action','name':'save_data',
                       'do':self.save_data_remote,
                       "param_type":str,'help':'Save a csv file onto the PNA computer containing the frequency, power, phase off all traces'})
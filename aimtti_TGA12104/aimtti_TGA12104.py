@@ -6,6 +6,15 @@ Supported instruments (identified):
 - 
 """
 
+import os
+import sys
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 
 class Driver():
     
@@ -58,8 +67,7 @@ class Driver_USB(Driver):
 
         assert self.ep_out is not None
         assert self.ep_in is not None
-        rm        = v.ResourceManager()
-        self.inst = rm.get_instrument(address)
+        self.inst = open_resource(address)
         
         Driver.__init__(self, **kwargs)
         
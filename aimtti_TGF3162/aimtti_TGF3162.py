@@ -6,11 +6,20 @@ Supported instruments (identified):
 -
 """
 
+import os
+import sys
 from typing import List
 import socket # library to communicate with instrument
 
 import numpy as np
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.async_transport import AsyncConnection, AsyncSocketTransport
+from driver_tools.visa_pool import open_resource
+
 
 class Driver():
     """ Class that is inhirited by Driver_SOCKET or Driver_VISA, depending on
@@ -117,6 +126,19 @@ class Driver_SOCKET(Driver):
         self.s.close()
 
 
+class Driver_ASYNC_SOCKET(AsyncConnection, Driver):
+    """ Driver_SOCKET run on the shared asyncio loop: awrite/aread/aquery
+    can be awaited to poll many instruments concurrently. """
+
+    def __init__(self, address: str = '192.168.1.23', port: int = 9221,
+                 **kwargs):
+        """ adress and port ready for TTI """
+        AsyncConnection.__init__(self, AsyncSocketTransport(address, port))
+
+        # initiate Driver
+        Driver.__init__(self, **kwargs)
+
+
 # WARNING: didn't test pyvisa for this instrument
 class Driver_VISA(Driver):
     """Class to initiate communication with instrument using VISA.
@@ -125,12 +147,8 @@ class Driver_VISA(Driver):
     def __init__(self, address: str = 'TCPIP::192.168.1.23::9221::SOCKET',
                  **kwargs):
         """ adress ready for TTI """
-        import pyvisa as visa
-        # Initialize VISA resource manager
-        self.rm = visa.ResourceManager()
-
-        # Open connection to the instrument
-        self.inst = self.rm.open_resource(address)
+        # Open connection to the instrument (shared VISA session pool)
+        self.inst = open_resource(address)
 
         # Set a timeout of 5000 milliseconds (5 seconds)
         self.inst.timeout = 5000
@@ -8,8 +8,17 @@ Note : Using SCPI commands and not API
 Tested on Anapico APULN40, may need to change hardcoded values for other models
 """
 
+import os
+import sys
 import numpy as np
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools import scpi_batch
+from driver_tools.visa_pool import open_resource
+
 category = 'Function generator'
 # =============================================================================
 # INSTRUMENT CLASS
@@ -33,6 +42,11 @@ class Driver():
     def get_id(self) -> str:
         return self.query('*IDN?')
 
+    def batch(self, opc: bool = True):
+        """ with dev.batch(): the writes of the setters are sent as a single
+        message followed by a single *OPC? """
+        return scpi_batch.batch(self, opc=opc)
+
     def _query_to_freq_in_ghz(self, ret: str) -> float:
         return float(ret) * 1e-9
 
@@ -133,13 +147,10 @@ class Driver_VISA(Driver):
 
     def __init__(self, address="USB0::0x03EB::0xAFFF::1F1-3C5G00001-2716::INSTR",
                  **kwargs):
-        
-        import pyvisa as visa
         self.TIMEOUT = 5000  # Default timeout of 5s
 
         # Instanciation
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.timeout = self.TIMEOUT
         
         Driver.__init__(self)
@@ -7,10 +7,18 @@ Supported instruments (identified):
 """
 
 import os
+import sys
 from numpy import savetxt,linspace
 import pandas
 import time
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace
+from driver_tools.visa_pool import open_resource
+
 category = 'Optical Spectrum Analyzer (OSA)'
 
 
@@ -76,10 +84,7 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR', **kwargs):
-        import visa as v
-    
-        r          = v.ResourceManager()
-        self.scope = r.get_instrument(address)
+        self.scope = open_resource(address)
         Driver.__init__(self)
 
     def query(self,query,length=1000000):
@@ -126,8 +131,7 @@ class Traces():
         self.data_dict = {}
         
     def get_data(self):
-        self.data        = self.dev.query(f"LDAT{self.trace}").split(',')[1:]
-        self.data        = [float(val.replace(' ','')) for val in self.data]
+        self.data        = parse_trace(self.dev.query(f"LDAT{self.trace}"),skip=1)  # first value is the number of points
         self.frequencies = self.get_frequencies(self.data)
         return self.frequencies,self.data
     
@@ -6,6 +6,15 @@ Supported instruments (identified): Anritsu MG369xC
 Note: use the SCPI manual and not the GPIB
 """
 
+import os
+import sys
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 category = 'Function generator'
 
 
@@ -60,10 +69,7 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::5::INSTR', **kwargs):
-        import pyvisa as visa
-
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
 
         Driver.__init__(self)
 
@@ -6,10 +6,20 @@ MS2830A/MS2840A/MS2850A
 - Spectrum Analyzer
 """
 
+import os
+import sys
 import time
+
 import numpy as np
 import pandas as pd
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace
+from driver_tools.visa_pool import open_resource
+
 category = 'Electrical Spectrum Analyzer (ESA)'
 
 
@@ -80,9 +90,7 @@ class Driver():
         return freq
 
     def power_array(self) -> np.ndarray:
-        power = self.query("TRAC? TRAC1").rstrip('\r\n').split(',')
-        power = np.array(power, dtype=float)  # convert str to float
-        return power
+        return parse_trace(self.query("TRAC? TRAC1"))
 
     def get_waveform(self) -> pd.DataFrame:
         """ Returns the trace 1 as a pd.DataDrame({"frequency(GHz)":np.ndarray, "power":np.ndarray}) """
@@ -137,10 +145,7 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::1::INSTR', **kwargs):
-        import pyvisa as visa
-
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.timeout = 3000
 
         Driver.__init__(self)
@@ -5,8 +5,18 @@
 Supported instruments (identified):
 - MS9710B
 """
+import os
+import sys
+
 import pandas as pd
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace
+from driver_tools.visa_pool import open_resource
+
 category = 'Optical Spectrum Analyzer (OSA)'
 
 
@@ -250,9 +260,8 @@ class Driver() :
 
         if self.TIMEOUT < 20000:
             self.controller.timeout = 20000
-        power = self.query("DMA?").split("\r\n") # DMA or DMB
+        power = parse_trace(self.query("DMA?"), sep=" ")  # DMA or DMB, one point per line
         self.controller.timeout = self.TIMEOUT
-        power = [float(point) for point in power]
 
         wl_start, wl_stop, points = self.get_condition()
         wl = linspace(float(wl_start), float(wl_stop), int(points))
@@ -419,10 +428,7 @@ class Driver() :
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::1::INSTR', **kwargs):
-        import pyvisa as visa
-
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
 
         self.TIMEOUT = 5000  # ms
         self.controller.timeout = self.TIMEOUT
@@ -6,7 +6,15 @@ Supported instruments (identified):
 - 
 """
 
+import os
+import sys
 import numpy as np
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
         
     
 
@@ -192,13 +200,10 @@ class Shutter :
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='ASRL::2::INSTR', **kwargs):
-        import visa 
-        
         self.BAUDRATE = 115200 
 
         # Instantiation
-        rm = visa.ResourceManager()
-        self.inst = rm.open_resource(address)
+        self.inst = open_resource(address)
         self.inst.timeout = 5000 #ms
         self.inst.baud_rate = self.BAUDRATE
         
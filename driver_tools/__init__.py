@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared between drivers (not a driver itself: no driver_tools.py).
+
+Import them the same way yenista_CT400 imports plotter, by adding the drivers
+folder to sys.path first.
+"""
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Parsing of traces sent as ASCII lists of numbers, at C speed and without
+evaluating anything received from the instrument.
+"""
+
+import warnings
+
+import numpy as np
+
+
+def parse_trace(text, sep=',', skip=0, dtype=np.float64) -> np.ndarray:
+    """ Return the numbers of text separated by sep as a 1D array.
+    A whitespace sep (' ') matches any run of spaces, tabs or newlines.
+    skip drops that many leading fields (e.g. a number of points header). """
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        text = bytes(text).decode()
+
+    if skip:
+        fields = text.split(sep, skip) if sep.strip() else text.split(None, skip)
+        text = fields[-1] if len(fields) > skip else ''
+
+    text = text.strip()
+    if sep.strip():
+        text = text.strip(sep.strip()).strip()  # a trailing separator would add a bogus value
+    if not text:
+        return np.empty(0, dtype)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)  # numpy < 2 only warns on garbage
+        try:
+            return np.fromstring(text, dtype, sep=sep)
+        except (ValueError, DeprecationWarning) as error:
+            raise ValueError(f"Can't parse trace '{text[:50]}...': {error}") from None
+
+
+def parse_trace_rows(text, sep=',', dtype=np.float64) -> np.ndarray:
+    """ Return a python-style list or list of lists ('[[1, 2], [3, 4]]') as a 2D array """
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        text = bytes(text).decode()
+    nb_rows = max(text.count('[') - 1, 1)
+    data = parse_trace(text.replace('[', ' ').replace(']', ' '), sep=sep, dtype=dtype)
+    if len(data) % nb_rows != 0:
+        raise ValueError(f"Can't split {len(data)} values in {nb_rows} rows of same length")
+    return data.reshape(nb_rows, -1)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio transports for socket, telnet and VXI-11 instruments.
+
+Transports expose coroutines (open, write, write_raw, read, read_raw,
+read_block, query, close) so a single event loop can talk to many
+instruments concurrently. AsyncConnection wraps a transport for the drivers:
+its write/read/query methods block like the other connection classes while
+awrite/aread/aquery can be awaited from any event loop, e.g.
+
+    await asyncio.gather(*(dev.aquery('*IDN?') for dev in devices))
+
+The transports of AsyncConnection live on a single background event loop
+shared by all drivers.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+from driver_tools.ieee_block import block_payload
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """ Return the background event loop shared by the async connections,
+    started on first use """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='driver_tools-asyncio', daemon=True).start()
+        return _loop
+
+
+def run(coro, timeout=None):
+    """ Run coro on the shared event loop and block until it returns """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+
+def submit(coro):
+    """ Schedule coro on the shared event loop and return an awaitable for
+    the caller's own event loop """
+    return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, get_loop()))
+
+
+class AsyncSocketTransport:
+    """ Raw TCP socket (SCPI over port 5025, 10001, 9221, ...) """
+
+    def __init__(self, address, port, read_termination=b'\n', write_termination='\n',
+                 timeout=5., encoding='utf-8'):
+        self.address = address
+        self.port = int(port)
+        self.read_termination = read_termination
+        self.write_termination = write_termination
+        self.timeout = timeout
+        self.encoding = encoding
+        self.reader = None
+        self.writer = None
+        self._lock = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.address, self.port), self.timeout)
+        self._lock = asyncio.Lock()
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """ Hold it to chain several calls without other tasks interleaving theirs """
+        return self._lock
+
+    async def write_raw(self, data: bytes):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def write(self, command: str):
+        await self.write_raw((command + self.write_termination).encode(self.encoding))
+
+    async def read_raw(self, size: int = None) -> bytes:
+        """ Return the next answer with its termination, or what is available
+        up to size bytes if size is given """
+        if size is not None:
+            return await asyncio.wait_for(self.reader.read(size), self.timeout)
+        return await asyncio.wait_for(self.reader.readuntil(self.read_termination), self.timeout)
+
+    async def read(self) -> str:
+        answer = await self.read_raw()
+        return answer[:-len(self.read_termination)].decode(self.encoding).strip()
+
+    async def read_block(self) -> bytes:
+        """ Return the payload of a definite length IEEE 488.2 binary block answer """
+        header = await asyncio.wait_for(self.reader.readexactly(2), self.timeout)
+        nb_digits = int(header[1:2])
+        if nb_digits == 0:  # indefinite length, ends with the termination
+            payload = await self.read_raw()
+            return payload[:-len(self.read_termination)]
+        length = int(await asyncio.wait_for(self.reader.readexactly(nb_digits), self.timeout))
+        payload = await asyncio.wait_for(self.reader.readexactly(length), self.timeout)
+        await asyncio.wait_for(self.reader.readuntil(self.read_termination), self.timeout)
+        return payload
+
+    async def query(self, command: str) -> str:
+        async with self._lock:
+            await self.write(command)
+            return await self.read()
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.writer = None
+
+
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+
+
+class AsyncTelnetTransport(AsyncSocketTransport):
+    """ Telnet session where every answer ends with a prompt (e.g. 'READY>').
+    All option negotiations are refused, as telnetlib does by default. """
+
+    def __init__(self, address, port=23, prompt=b'READY>', write_termination='\r\n',
+                 timeout=5., encoding='utf-8'):
+        AsyncSocketTransport.__init__(self, address, port, read_termination=prompt,
+                                      write_termination=write_termination,
+                                      timeout=timeout, encoding=encoding)
+        self._buffer = bytearray()
+        self._pending = b''  # telnet command split between two packets
+
+    async def _receive(self):
+        """ Append the next received bytes to the buffer without telnet commands """
+        data = await self.reader.read(4096)
+        if not data:
+            raise ConnectionError(f'Telnet connection to {self.address} closed')
+        data, self._pending = self._pending + data, b''
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            if byte != IAC:
+                self._buffer.append(byte)
+                i += 1
+                continue
+            if i + 1 >= len(data):
+                self._pending = data[i:]
+                break
+            command = data[i + 1]
+            if command == IAC:
+                self._buffer.append(IAC)
+                i += 2
+            elif command in (DO, DONT, WILL, WONT):
+                if i + 2 >= len(data):
+                    self._pending = data[i:]
+                    break
+                if command in (DO, WILL):
+                    self.writer.write(bytes((IAC, WONT if command == DO else DONT, data[i + 2])))
+                i += 3
+            elif command == SB:
+                end = data.find(bytes((IAC, SE)), i + 2)
+                if end < 0:
+                    self._pending = data[i:]
+                    break
+                i = end + 2
+            else:
+                i += 2
+
+    async def read_raw(self, size: int = None) -> bytes:
+        """ Return everything up to and including the next prompt, or what is
+        available up to size bytes if size is given """
+        async def receive_answer():
+            while True:
+                if size is not None and self._buffer:
+                    end = min(size, len(self._buffer))
+                    break
+                end = self._buffer.find(self.read_termination)
+                if end >= 0:
+                    end += len(self.read_termination)
+                    break
+                await self._receive()
+            answer = bytes(self._buffer[:end])
+            del self._buffer[:end]
+            return answer
+        return await asyncio.wait_for(receive_answer(), self.timeout)
+
+    async def read(self) -> str:
+        answer = await self.read_raw()
+        return answer.decode(self.encoding).replace(self.read_termination.decode(self.encoding), '').strip()
+
+
+class AsyncVXI11Transport:
+    """ VXI-11 (ONC RPC) instrument. python-vxi11 is blocking, so each
+    transport runs its calls in order on its own worker thread while the
+    event loop keeps serving the other instruments. """
+
+    def __init__(self, address, timeout=None):
+        self.address = address
+        self.timeout = timeout
+        self.inst = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix=f'vxi11-{address}')
+        self._lock = None
+
+    def _call(self, function, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def open(self):
+        import vxi11 as v
+        self.inst = await self._call(v.Instrument, self.address)
+        if self.timeout is not None:
+            self.inst.timeout = self.timeout
+        self._lock = asyncio.Lock()
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """ Hold it to chain several calls without other tasks interleaving theirs """
+        return self._lock
+
+    async def write_raw(self, data: bytes):
+        await self._call(self.inst.write_raw, data)
+
+    async def write(self, command: str):
+        await self._call(self.inst.write, command)
+
+    async def read_raw(self, size: int = -1) -> bytes:
+        return await self._call(self.inst.read_raw, -1 if size is None else size)
+
+    async def read(self) -> str:
+        return await self._call(self.inst.read)
+
+    async def read_block(self) -> bytes:
+        return bytes(block_payload(await self.read_raw()))
+
+    async def query(self, command: str) -> str:
+        async with self._lock:
+            return await self._call(self.inst.ask, command)
+
+    async def close(self):
+        if self.inst is not None:
+            await self._call(self.inst.close)
+            self.inst = None
+        self._executor.shutdown(wait=False)
+
+
+class AsyncConnection:
+    """ Mixin for the ASYNC connection classes of the drivers: blocking
+    write/read/read_raw/query/close like the other connection classes, and
+    awrite/aread/aread_raw/aquery coroutines usable from any event loop """
+
+    def __init__(self, transport):
+        self.transport = transport
+        run(self.transport.open())
+
+    def write(self, command):
+        return run(self.transport.write(command))
+
+    def write_raw(self, data):
+        return run(self.transport.write_raw(data))
+
+    def read(self):
+        return run(self.transport.read())
+
+    def read_raw(self, size=None):
+        return run(self.transport.read_raw(size))
+
+    def read_block(self):
+        return run(self.transport.read_block())
+
+    def query(self, command):
+        return run(self.transport.query(command))
+
+    def awrite(self, command):
+        return submit(self.transport.write(command))
+
+    def aread(self):
+        return submit(self.transport.read())
+
+    def aread_raw(self, size=None):
+        return submit(self.transport.read_raw(size))
+
+    def aquery(self, command):
+        return submit(self.transport.query(command))
+
+    def close(self):
+        run(self.transport.close())
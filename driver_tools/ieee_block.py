@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+IEEE-488.2 definite-length arbitrary block helpers (#<n><length><payload>).
+
+Scopes return their traces as such a block, sometimes preceded by a command
+echo (e.g. 'C1:WF DAT1,' on Lecroy) and followed by a terminator.
+"""
+
+import numpy as np
+
+
+def parse_block_header(raw, start=0) -> tuple:
+    """ Return (offset, length) of the payload of the block contained in raw.
+    The header is located by the first '#' found after start. For an
+    indefinite-length block (#0) the payload runs up to the trailing newline. """
+    start = raw.find(b'#', start)
+    if start == -1 or start + 1 >= len(raw):
+        raise ValueError("No IEEE-488.2 block header found in answer")
+
+    nb_digits = raw[start+1] - ord('0')
+    if not 0 <= nb_digits <= 9:
+        raise ValueError(f"Malformed IEEE-488.2 block header: {bytes(raw[start:start+2])}")
+
+    offset = start + 2 + nb_digits
+    if nb_digits == 0:
+        end = len(raw) - 1 if raw.endswith(b'\n') else len(raw)
+        return offset, end - offset
+
+    length = int(raw[start+2:offset])
+    if offset + length > len(raw):
+        raise ValueError(f"Truncated IEEE-488.2 block: expected {length} bytes, received {len(raw)-offset}")
+    return offset, length
+
+
+def block_payload(raw) -> memoryview:
+    """ Return a zero-copy view on the payload of the block contained in raw """
+    offset, length = parse_block_header(raw)
+    return memoryview(raw)[offset:offset+length]
+
+
+def block_payloads(raw, count=None) -> list:
+    """ Return zero-copy views on the payloads of consecutive blocks in raw,
+    as answered to several queries chained with ';' in a single message """
+    view = memoryview(raw)
+    payloads = []
+    position = 0
+    while count is None or len(payloads) < count:
+        if raw.find(b'#', position) == -1:
+            break
+        offset, length = parse_block_header(raw, position)
+        payloads.append(view[offset:offset+length])
+        position = offset + length
+    if count is not None and len(payloads) != count:
+        raise ValueError(f"Expected {count} IEEE-488.2 blocks in answer, found {len(payloads)}")
+    return payloads
+
+
+def block_to_array(raw, dtype) -> np.ndarray:
+    """ Return a read-only numpy view on the payload of the block contained in raw """
+    dtype = np.dtype(dtype)
+    offset, length = parse_block_header(raw)
+    return np.frombuffer(raw, dtype, count=length//dtype.itemsize, offset=offset)
+
+
+class BlockReader:
+    """ Read blocks from a stream exposing recv_into/readinto into a reused buffer.
+
+    The returned views point into the internal buffer and are overwritten by
+    the next read: copy them if they must outlive it. """
+
+    def __init__(self, recv_into, size=0):
+        self.recv_into = recv_into
+        self.buffer = bytearray(size)
+        self._byte = bytearray(1)
+
+    def _fill(self, view):
+        while len(view) != 0:
+            nbytes = self.recv_into(view)
+            if not nbytes:
+                raise ConnectionError("Connection closed while reading IEEE-488.2 block")
+            view = view[nbytes:]
+
+    def _read_byte(self) -> int:
+        self._fill(memoryview(self._byte))
+        return self._byte[0]
+
+    def read(self, terminator=b'\n') -> memoryview:
+        """ Read one block and return a view on its payload.
+        The terminator sent after the payload is consumed as well """
+        while self._read_byte() != ord('#'):
+            pass
+        nb_digits = self._read_byte() - ord('0')
+        if not 1 <= nb_digits <= 9:
+            raise ValueError(f"Unsupported IEEE-488.2 block header: #{chr(nb_digits+ord('0'))}")
+
+        digits = bytearray(nb_digits)
+        self._fill(memoryview(digits))
+        length = int(digits)
+
+        if len(self.buffer) < length:
+            self.buffer = bytearray(length)
+        payload = memoryview(self.buffer)[:length]
+        self._fill(payload)
+        for _ in terminator:
+            self._read_byte()
+        return payload
+
+    def read_array(self, dtype, terminator=b'\n') -> np.ndarray:
+        """ Read one block and return a numpy view on its payload """
+        return np.frombuffer(self.read(terminator), dtype)
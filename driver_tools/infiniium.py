@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Waveform helpers for the Agilent/Keysight Infiniium scopes
+(DSO81204B, DSA91304A, DSO54853A).
+"""
+
+import numpy as np
+
+
+# :WAVeform:FORMat -> dtype of the binary payload (:WAVeform:BYTeorder LSBFirst)
+DTYPES = {'BYTE': np.dtype('int8'), 'WORD': np.dtype('<i2')}
+
+
+class Preamble:
+    """ Parsed answer of :WAVeform:PREamble?
+
+    <format>, <type>, <points>, <count>, <X increment>, <X origin>,
+    <X reference>, <Y increment>, <Y origin>, <Y reference>, ... """
+
+    def __init__(self, answer: str):
+        fields = answer.strip().split(',')
+        self.format = int(float(fields[0]))
+        self.type = int(float(fields[1]))
+        self.points = int(float(fields[2]))
+        self.count = int(float(fields[3]))
+        self.x_increment = float(fields[4])
+        self.x_origin = float(fields[5])
+        self.x_reference = float(fields[6])
+        self.y_increment = float(fields[7])
+        self.y_origin = float(fields[8])
+        self.y_reference = float(fields[9])
+
+        self._time = None
+
+    def to_volts(self, data: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ Convert raw samples to volts in float32 without intermediate arrays:
+        Y = (data - Y reference) * Y increment + Y origin """
+        if out is None:
+            out = np.empty(data.shape, np.float32)
+        offset = self.y_origin - self.y_reference*self.y_increment
+        np.multiply(data, np.float32(self.y_increment), out=out, dtype=np.float32)
+        np.add(out, np.float32(offset), out=out)
+        return out
+
+    def time(self, points: int = None) -> np.ndarray:
+        """ Return the time axis, built once and then reused:
+        X = (index - X reference) * X increment + X origin """
+        if points is None:
+            points = self.points
+        if self._time is None or len(self._time) != points:
+            self._time = np.arange(points, dtype=np.float64)
+            self._time -= self.x_reference
+            self._time *= self.x_increment
+            self._time += self.x_origin
+            self._time.flags.writeable = False
+        return self._time
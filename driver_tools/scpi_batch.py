@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Write coalescing for SCPI drivers.
+
+Inside ``with batch(dev):`` the writes of the driver (and of its submodules)
+are buffered and sent as one semicolon-joined SCPI message, and the *OPC?
+queries of the setters are replaced by a single one at the end: configuring
+an instrument costs one round trip instead of one per setting.
+"""
+
+from contextlib import contextmanager
+
+
+class BatchedResource:
+    """ Stand-in for the instrument resource of a connection class (pyvisa
+    resource, ...) that buffers the writes. A query sends the pending
+    writes together with it in the same message, a read sends them first. """
+
+    def __init__(self, resource, max_length=None):
+        self.resource = resource
+        self.max_length = max_length  # input buffer size of the instrument, in characters
+        self.pending = []
+        self.opc_pending = False
+        self.messages_sent = 0
+
+    def __getattr__(self, name):
+        return getattr(self.resource, name)
+
+    @staticmethod
+    def join(commands) -> str:
+        """ Join commands in a single program message. Each one is made
+        absolute with a leading ':' so it does not inherit the header path
+        of the previous one. """
+        return ';'.join(command if command.startswith((':', '*')) else ':' + command
+                        for command in (command.strip() for command in commands))
+
+    def write(self, command):
+        if self.max_length is not None and self.pending \
+                and len(self.join(self.pending + [command])) > self.max_length:
+            self.flush()
+        self.pending.append(command)
+
+    def _message(self, command) -> str:
+        """ Return command joined after the pending writes, which are then cleared """
+        message = self.join(self.pending + [command])
+        self.pending = []
+        self.messages_sent += 1
+        return message
+
+    def query(self, command):
+        if command.strip().upper() == '*OPC?':
+            self.opc_pending = True  # done once when leaving the batch
+            return '1'
+        return self.resource.query(self._message(command))
+
+    def query_binary_values(self, command, *args, **kwargs):
+        return self.resource.query_binary_values(self._message(command), *args, **kwargs)
+
+    def query_ascii_values(self, command, *args, **kwargs):
+        return self.resource.query_ascii_values(self._message(command), *args, **kwargs)
+
+    def read(self, *args, **kwargs):
+        self.flush()
+        return self.resource.read(*args, **kwargs)
+
+    def read_raw(self, *args, **kwargs):
+        self.flush()
+        return self.resource.read_raw(*args, **kwargs)
+
+    def read_bytes(self, *args, **kwargs):
+        self.flush()
+        return self.resource.read_bytes(*args, **kwargs)
+
+    def flush(self):
+        """ Send the pending writes """
+        if self.pending:
+            message = self.join(self.pending)
+            self.pending = []
+            self.messages_sent += 1
+            self.resource.write(message)
+
+
+@contextmanager
+def batch(dev, attribute='controller', opc=True, max_length=None):
+    """ Buffer the writes sent through dev.<attribute> until the end of the
+    with block, then send them as one message followed by a single *OPC?
+    (if opc or if a setter asked for one). Nothing is sent if the block
+    raises. Nested batches join the outer one. Raises TypeError if the
+    connection has no such resource to buffer (e.g. a GPIB connection
+    talking through another attribute). """
+    resource = getattr(dev, attribute, None)
+    if resource is None:
+        raise TypeError(f"Can't batch the writes of {type(dev).__name__}: no '{attribute}' resource")
+    if isinstance(resource, BatchedResource):
+        yield resource
+        return
+
+    batched = BatchedResource(resource, max_length=max_length)
+    setattr(dev, attribute, batched)
+    try:
+        yield batched
+    finally:
+        setattr(dev, attribute, resource)
+
+    batched.flush()
+    if opc or batched.opc_pending:
+        resource.query('*OPC?')
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Continuous acquisition: a background thread fills a bounded ring buffer of
+frames that a consumer (saving, analysis, ...) empties at its own pace.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """ Bounded FIFO of equally shaped frames stored in a single numpy array.
+    When full, the oldest frame is overwritten and counted as dropped, or
+    with drop_oldest=False put waits until a frame is read. """
+
+    def __init__(self, capacity: int, drop_oldest: bool = True):
+        self.capacity = int(capacity)
+        assert self.capacity > 0, "Ring buffer capacity must be positive"
+        self.drop_oldest = bool(drop_oldest)
+        self.frames = None  # allocated with the first frame
+        self.dropped = 0
+        self._head = 0  # index of the oldest frame
+        self._count = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return self._count
+
+    def put(self, frame: np.ndarray):
+        """ Copy frame into the buffer. Without drop_oldest, wait for a free
+        slot first (a frame is still dropped if the buffer gets closed) """
+        with self._condition:
+            if not self.drop_oldest:
+                self._condition.wait_for(lambda: self._count < self.capacity or self._closed)
+            if self.frames is None:
+                self.frames = np.empty((self.capacity,) + frame.shape, frame.dtype)
+            elif frame.shape != self.frames.shape[1:]:
+                raise ValueError(f"Frame shape changed from {self.frames.shape[1:]} to {frame.shape} during stream")
+
+            if self._count == self.capacity:
+                self._head = (self._head + 1) % self.capacity
+                self._count -= 1
+                self.dropped += 1
+            self.frames[(self._head + self._count) % self.capacity] = frame
+            self._count += 1
+            self._condition.notify_all()
+
+    def get(self, timeout: float = None) -> np.ndarray:
+        """ Return a copy of the oldest frame, waiting up to timeout seconds.
+        Return None if no frame arrived or the buffer is closed and empty. """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._count or self._closed, timeout):
+                return None
+            if self._count == 0:
+                return None
+            frame = self.frames[self._head].copy()
+            self._head = (self._head + 1) % self.capacity
+            self._count -= 1
+            self._condition.notify_all()
+            return frame
+
+    def get_all(self) -> np.ndarray:
+        """ Return a copy of all pending frames, oldest first, and empty the buffer """
+        with self._condition:
+            if self.frames is None:
+                return np.empty((0,))
+            index = (self._head + np.arange(self._count)) % self.capacity
+            frames = self.frames[index]
+            self._head = 0
+            self._count = 0
+            self._condition.notify_all()
+            return frames
+
+    def close(self):
+        """ Wake up consumers waiting for a frame that will never come """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class StreamAcquisition:
+    """ Call acquire() in a loop from a background thread and store its frames
+    in a FrameRingBuffer. If consumer is given, it is called as
+    consumer(frame, index) from a second thread for every frame kept.
+    With drop_oldest=False no frame is lost: acquisition pauses while the
+    buffer is full. """
+
+    def __init__(self, acquire, capacity=64, consumer=None, nb_frames=None, drop_oldest=True):
+        self.acquire = acquire
+        self.consumer = consumer
+        self.nb_frames = None if nb_frames is None else int(nb_frames)
+        self.buffer = FrameRingBuffer(capacity, drop_oldest)
+
+        self.frames_acquired = 0
+        self.frames_consumed = 0
+        self.error = None
+        self._start_time = None
+        self._stop_time = None
+        self._stop_flag = threading.Event()
+        self._producer = threading.Thread(target=self._produce, daemon=True)
+        self._consumer = threading.Thread(target=self._consume, daemon=True) if consumer else None
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._producer.start()
+        if self._consumer: self._consumer.start()
+
+    def stop(self):
+        """ Stop acquiring and wait until the consumer handled the remaining frames """
+        self._stop_flag.set()
+        if self._consumer is None:
+            self.buffer.close()  # nobody would free a slot for a waiting put
+        self.join()
+
+    def join(self, timeout=None):
+        if self._producer.is_alive(): self._producer.join(timeout)
+        if self._consumer and self._consumer.is_alive(): self._consumer.join(timeout)
+
+    def is_running(self) -> bool:
+        return self._producer.is_alive()
+
+    def _produce(self):
+        try:
+            while not self._stop_flag.is_set():
+                if self.nb_frames is not None and self.frames_acquired >= self.nb_frames:
+                    break
+                self.buffer.put(self.acquire())
+                self.frames_acquired += 1
+        except Exception as error:
+            self.error = error
+        finally:
+            self._stop_time = time.perf_counter()
+            self.buffer.close()
+
+    def _consume(self):
+        try:
+            while True:
+                frame = self.buffer.get()
+                if frame is None:
+                    break
+                self.consumer(frame, self.frames_consumed)
+                self.frames_consumed += 1
+        except Exception as error:
+            self.error = error
+            self._stop_flag.set()
+            self.buffer.close()  # don't leave the producer waiting for a free slot
+
+    def get_fps(self) -> float:
+        """ Return the mean number of frames acquired per second """
+        if self._start_time is None:
+            return 0.
+        end = self._stop_time if self._stop_time is not None else time.perf_counter()
+        return self.frames_acquired / (end - self._start_time) if end > self._start_time else 0.
+
+    def get_dropped(self) -> int:
+        """ Return the number of frames overwritten before being consumed """
+        return self.buffer.dropped
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide pool of VISA sessions.
+
+A single ResourceManager is created per VISA backend and sessions are kept
+by address: opening an address already open (or recently closed) hands back
+the same session instead of going through VISA discovery and open again.
+Closing a pooled resource only releases it; the session is really closed
+once it stayed unused for the idle TTL.
+"""
+
+import atexit
+import threading
+import time
+
+
+IDLE_TTL = 60.  # seconds an unused session is kept open
+
+_lock = threading.RLock()
+_resource_managers = {}
+_sessions = {}
+_stats = {'opened': 0, 'reused': 0, 'closed': 0}
+
+
+class _Session:
+
+    def __init__(self, key, resource):
+        self.key = key
+        self.resource = resource
+        self.refcount = 0
+        self.released_at = None
+        self.timer = None
+
+
+class PooledResource:
+    """ Proxy on a pooled pyvisa resource: behaves like the resource except
+    close() which releases it back to the pool """
+
+    def __init__(self, session):
+        object.__setattr__(self, '_session', session)
+        object.__setattr__(self, '_released', False)
+
+    def __getattr__(self, name):
+        return getattr(self._session.resource, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._session.resource, name, value)
+
+    def close(self):
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            _release(self._session)
+
+
+def _import_visa():
+    try:
+        import pyvisa as visa
+    except ImportError:
+        import visa
+    return visa
+
+
+def get_resource_manager(backend=''):
+    """ Return the ResourceManager shared by all drivers for this backend """
+    with _lock:
+        if backend not in _resource_managers:
+            visa = _import_visa()
+            _resource_managers[backend] = visa.ResourceManager(backend) if backend else visa.ResourceManager()
+        return _resource_managers[backend]
+
+
+def open_resource(address, backend='', **kwargs) -> PooledResource:
+    """ Return a pooled session on address, opened only if not already in the pool.
+    kwargs are passed to ResourceManager.open_resource when the session is opened """
+    key = (backend, str(address))
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            resource = get_resource_manager(backend).open_resource(address, **kwargs)
+            session = _Session(key, resource)
+            _sessions[key] = session
+            _stats['opened'] += 1
+        else:
+            _stats['reused'] += 1
+            if session.timer is not None:
+                session.timer.cancel()
+                session.timer = None
+        session.refcount += 1
+        session.released_at = None
+        return PooledResource(session)
+
+
+def _release(session):
+    with _lock:
+        session.refcount -= 1
+        if session.refcount > 0:
+            return
+        session.released_at = time.monotonic()
+        if IDLE_TTL <= 0:
+            _close(session)
+        else:
+            session.timer = threading.Timer(IDLE_TTL, _expire, args=(session,))
+            session.timer.daemon = True
+            session.timer.start()
+
+
+def _expire(session):
+    with _lock:
+        if session.refcount == 0 and _sessions.get(session.key) is session:
+            _close(session)
+
+
+def _close(session):
+    if session.timer is not None:
+        session.timer.cancel()
+        session.timer = None
+    _sessions.pop(session.key, None)
+    try:
+        session.resource.close()
+    except Exception:
+        pass
+    _stats['closed'] += 1
+
+
+def set_idle_ttl(seconds):
+    """ Set how long released sessions are kept open (0 closes them on release) """
+    global IDLE_TTL
+    IDLE_TTL = float(seconds)
+
+
+def close_idle():
+    """ Close every session not used by a driver anymore """
+    with _lock:
+        for session in list(_sessions.values()):
+            if session.refcount == 0:
+                _close(session)
+
+
+@atexit.register
+def close_all():
+    """ Close every pooled session, in use or not """
+    with _lock:
+        for session in list(_sessions.values()):
+            _close(session)
+
+
+def get_pool_stats() -> dict:
+    """ Return the number of sessions opened, reused and closed so far, and
+    the number of sessions currently in use or idle """
+    with _lock:
+        stats = dict(_stats)
+        stats['active'] = sum(1 for session in _sessions.values() if session.refcount > 0)
+        stats['idle'] = len(_sessions) - stats['active']
+        return stats
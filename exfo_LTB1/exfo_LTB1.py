@@ -6,6 +6,15 @@ Supported instruments (identified):
 - 
 """
 
+import os
+import sys
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.async_transport import AsyncConnection, AsyncTelnetTransport
+
 
 class Driver():
 
@@ -72,6 +81,20 @@ class Driver_TELNET(Driver):
         try : self.controller.close()
         except : pass
     
+
+class Driver_ASYNC_TELNET(AsyncConnection, Driver):
+    """Driver_TELNET run on the shared asyncio loop: awrite/aquery can be awaited to poll many instruments concurrently"""
+    def __init__(self, address='192.168.0.1', **kwargs):
+        AsyncConnection.__init__(self, AsyncTelnetTransport(address,5024))
+        while 'Connected' not in self.read():
+            pass
+        Driver.__init__(self, **kwargs)
+
+    def write(self,command):
+        """Every command is answered by the READY> prompt"""
+        return self.query(command)
+    def awrite(self,command):
+        return self.aquery(command)
 ############################## Connections classes ##############################
 #################################################################################    
     
@@ -5,8 +5,16 @@
 Supported instruments (identified):
 - Exfo pm1613 
 """
+import os
+import sys
 import time
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 class Driver():
     
     def __init__(self):
@@ -83,13 +91,10 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR',**kwargs):
-        import visa
-        
         self.TIMEOUT = 10000 #ms
         
         # Instantiation
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.timeout = self.TIMEOUT
         Driver.__init__(self)        
 
@@ -6,6 +6,15 @@ Supported instruments (identified):
 - 
 """
 
+import os
+import sys
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 
 class Driver():
     
@@ -37,10 +46,7 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB::7::INSTR', **kwargs):
-        import visa as v
-        
-        r = v.ResourceManager()
-        self.scope = r.get_instrument(address)
+        self.scope = open_resource(address)
         Driver.__init__(self)
         
     def query(self, query, length=1000000):
@@ -6,8 +6,16 @@ Created on Wed Apr  3 20:06:08 2019
 @author: quentin.chateiller
 """
 
+import os
+import sys
 import time
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 
 class Driver():
 
@@ -37,13 +45,10 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR',**kwargs):
-        import visa
-        
         self.TIMEOUT = 15000 #ms
         
         # Instantiation
-        rm = visa.ResourceManager()
-        self.controller = rm.get_instrument(address)
+        self.controller = open_resource(address)
         self.controller.timeout = self.TIMEOUT
         self.controller.read_termination='\n'
         self.controller.write_termination='\n'
@@ -6,6 +6,15 @@ Supported instruments (identified):
 - 
 """
 
+import os
+import sys
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 
 
 class Driver():
@@ -62,12 +71,9 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::22::INSTR',**kwargs):
-        import visa
-
         self.TIMEOUT = 5000 #ms
         # Instantiation
-        rm = visa.ResourceManager()
-        self.controller = rm.get_instrument(address)
+        self.controller = open_resource(address)
         self.controller.timeout = self.TIMEOUT
         
         Driver.__init__(self)
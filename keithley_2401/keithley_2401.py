@@ -7,6 +7,16 @@ Keithley 2400, 2401
 -
 """
 
+import os
+import sys
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools import scpi_batch
+from driver_tools.visa_pool import open_resource
+
 category = 'Source measure unit (SMU)'
 
 
@@ -74,6 +84,11 @@ class Driver():
     def get_id(self):
         return self.query('*IDN?')
 
+    def batch(self, opc=True):
+        """ with dev.batch(): the writes of the setters are sent as a single message followed by a single *OPC?
+        Only available with the VISA connection, raises TypeError with the GPIB one """
+        return scpi_batch.batch(self, opc=opc)
+
     def get_driver_model(self):
         model = []
         model.append({'element':'variable','name':'current','unit':'A','read':self.get_current,'type':float,'help':'Current at the output as measured (read only)'})
@@ -89,12 +104,9 @@ class Driver():
 class Driver_VISA(Driver):
 
     def __init__(self, address='GPIB0::22::INSTR',**kwargs):
-        import pyvisa as visa
-
         self.TIMEOUT = 5000 #ms
         # Instantiation
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.timeout = self.TIMEOUT
 
         Driver.__init__(self)
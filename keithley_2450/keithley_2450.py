@@ -5,9 +5,18 @@ Created on Wed Apr 17 14:27:16 2024
 @author: Hamza Dely, wrapped for combo-box by Victor
 """
 
+import os
+import sys
 import math
 from typing import Tuple, List
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools import scpi_batch
+from driver_tools.visa_pool import open_resource
+
 class Driver:
 
     def __init__(self):
@@ -61,6 +70,11 @@ class Driver:
     def measure_mode(self) -> str:
         return self._get_str_active_mode(self._measure_modes)
 
+    def batch(self, opc: bool = True):
+        """ with dev.batch(): the writes of the setters are sent as a single
+        message followed by a single *OPC? """
+        return scpi_batch.batch(self, opc=opc)
+
     def reset(self):
         self.write('*CLS')
         self.write('*LANG SCPI') # Force SCPI 2450 commands mode
@@ -348,13 +362,10 @@ class Driver_VISA(Driver):
 
     def __init__(self, address: str = 'USB0::0x05E6::0x2450::04081087::INSTR',
                  **kwargs):
-
-        import pyvisa as visa
         self.TIMEOUT = 5000  # Default timeout of 5s
 
         # Instanciation
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.timeout = self.TIMEOUT
         
         Driver.__init__(self)
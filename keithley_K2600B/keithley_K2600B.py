@@ -6,6 +6,15 @@ Supported instruments (identified):
 -
 """
 
+import os
+import sys
+
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 category = 'Source measure unit (SMU)'
 
 
@@ -38,13 +47,10 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::26::INSTR',**kwargs):
-        import visa
-
         self.TIMEOUT = 5000 #ms
 
         # Instantiation
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.timeout = self.TIMEOUT
 
         Driver.__init__(self)
@@ -14,8 +14,16 @@ CEFA-L-HG
 CTFA-PB
 """
 
+import os
+import sys
 import time
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 
 class Driver() :
 
@@ -213,10 +221,7 @@ class Driver() :
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR', **kwargs):
-        import pyvisa as visa
-
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.write_termination = 0x00  #needed in order to read properly from the optical amplifier
         self.controller.read_termination = 0x00
 
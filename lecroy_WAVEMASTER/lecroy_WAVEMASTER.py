@@ -9,10 +9,18 @@ Supported instruments (identified):
 """
 
 import os
+import sys
 import time
 from numpy import int8,int16,frombuffer
 import numpy as np
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ieee_block import block_payload
+from driver_tools.async_transport import AsyncConnection, AsyncVXI11Transport
+
 
 class Driver():
     
@@ -38,7 +46,7 @@ class Driver():
         if channels == []: channels = list(range(1,self.nb_channels+1))
         for i in channels:
             if not(getattr(self,f'channel{i}').is_active()): continue
-            getattr(self,f'channel{i}').get_data_raw()
+            getattr(self,f'channel{i}')._get_data_block()
             getattr(self,f'channel{i}').get_log_data()
         self.set_previous_trigger_state(previous_trigger_state)
         
@@ -126,6 +134,12 @@ class Driver_VXI11(Driver):
         self.inst.write(cmd)
     def close(self):
         self.inst.close()
+
+class Driver_ASYNC_VXI11(AsyncConnection, Driver):
+    """Driver_VXI11 run on the shared asyncio loop: awrite/aread/aquery can be awaited to poll many instruments concurrently"""
+    def __init__(self, address='192.168.0.1', **kwargs):
+        AsyncConnection.__init__(self, AsyncVXI11Transport(address))
+        Driver.__init__(self, **kwargs)
 ############################## Connections classes ##############################
 #################################################################################
 
@@ -138,16 +152,18 @@ class Channel():
         self.autoscale_factor = 8
     
     
-    def get_data_raw(self):
+    def _get_data_block(self):
+        """Query the trace and return a zero-copy view on the block payload"""
         if self.autoscale:
             self.do_autoscale()
         self.dev.write(f'C{self.channel}:WF? DAT1')
-        self.data_raw = self.dev.read_raw()
-        self.data_raw = self.data_raw[self.data_raw.find(b'#')+11:-1]
+        self.data_raw = block_payload(self.dev.read_raw())
         return self.data_raw
+    def get_data_raw(self):
+        return bytes(self._get_data_block())
     def get_data(self):
-        if self.dev.encoding=='BYTE': return frombuffer(self.get_data_raw(),int8)
-        if self.dev.encoding=='WORD': return frombuffer(self.get_data_raw(),int16)
+        if self.dev.encoding=='BYTE': return frombuffer(self._get_data_block(),int8)
+        if self.dev.encoding=='WORD': return frombuffer(self._get_data_block(),int16)
     def get_log_data(self):
         self.log_data = self.dev.query(f"C{self.channel}:INSP? 'WAVEDESC'")
         return self.log_data
@@ -9,6 +9,7 @@ Supported instruments (identified):
 
 import time 
 import os
+import sys
 import matplotlib.pyplot as plt
 from scipy.signal import savgol_filter
 from scipy.interpolate import interp1d
@@ -16,6 +17,12 @@ from scipy.interpolate import interp1d
 import numpy as np
 import pandas as pd
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 class Driver():
     
     slot_config = '<MODULE_NAME>,<CALIBRATION_PATH>'
@@ -49,14 +56,10 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR',**kwargs):
-        import visa
-        
-        
         self.BAUDRATE = 115200
         
         # Initialisation
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.baud_rate = self.BAUDRATE
         
         Driver.__init__(self,**kwargs)
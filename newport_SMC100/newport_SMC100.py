@@ -5,8 +5,16 @@
 Supported instruments (identified):
 - Newport smc100
 """
+import os
+import sys
 import time
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 category = 'Motion controller'
 
 
@@ -42,8 +50,7 @@ class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR', **kwargs):
         import pyvisa as visa
 
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         self.controller.baud_rate = 57600
         self.controller.flow_control = visa.constants.VI_ASRL_FLOW_XON_XOFF
         self.controller.read_termination = '\r\n'
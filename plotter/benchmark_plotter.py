@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the plotter analysis functions on synthetic spectra.
+
+    python benchmark_plotter.py                          # every benchmark, 1e3 to 1e6 points
+    python benchmark_plotter.py --sizes 1e3 1e5 1e7 -k sweep
+    python benchmark_plotter.py --output before.csv      # then --compare before.csv after a change
+
+Runs offline without instrument nor autolab. Each benchmark reports the best
+time of --repeat runs and the peak of memory allocated by one run (tracemalloc,
+which also sees the numpy arrays). Data generation and file writing are not timed.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import plotter
+
+
+X_START, X_STOP = 1500., 1600.  # nm
+
+
+def lorentzian(size, center=1550., width=0.05, depth_db=20.):
+    """ Transmission dip of a resonance in dB """
+    x = np.linspace(X_START, X_STOP, int(size))
+    linear = 1 - (1 - 10**(-depth_db/10)) * (width/2)**2 / ((x - center)**2 + (width/2)**2)
+    return x, 10*np.log10(linear)
+
+
+def gaussian(size, center=1550., width=5., peak_db=0., floor_db=-40.):
+    """ Emission peak in dB over a noise floor """
+    x = np.linspace(X_START, X_STOP, int(size))
+    linear = 10**(floor_db/10) + 10**(peak_db/10) * np.exp(-4*np.log(2) * (x - center)**2 / width**2)
+    return x, 10*np.log10(linear)
+
+
+def comb(size, nb_peaks=200, width=0.02, depth_db=10., noise_db=0.05, seed=0):
+    """ Ring resonator like transmission: nb_peaks Lorentzian dips with noise """
+    x = np.linspace(X_START, X_STOP, int(size))
+    linear = np.ones_like(x)
+    for center in np.linspace(X_START, X_STOP, nb_peaks + 2)[1:-1]:
+        linear -= (1 - 10**(-depth_db/10)) * (width/2)**2 / ((x - center)**2 + (width/2)**2)
+    noise = np.random.default_rng(seed).normal(0, noise_db, len(x))
+    return x, 10*np.log10(linear) + noise
+
+
+def write_csv(directory, size):
+    x, y = gaussian(size)
+    filename = os.path.join(directory, f"spectrum_{int(size)}.txt")
+    pd.DataFrame({"wavelength": x, "power": y}).to_csv(filename, index=False, sep="\t")
+    plotter._sniff_cache.clear()
+    return filename
+
+
+def write_npy(directory, size):
+    x, y = gaussian(size)
+    filename = os.path.join(directory, f"spectrum_{int(size)}.npy")
+    np.save(filename, np.column_stack([x, y]))
+    return filename
+
+
+# name: (setup(size, directory) -> args, function(*args), largest size worth running)
+BENCHMARKS = {
+    "sweep_analyse global lorentzian": (
+        lambda size, directory: lorentzian(size),
+        lambda x, y: plotter.sweep_analyse(x, y, level=3, comparator=np.less), None),
+    "sweep_analyse global gaussian": (
+        lambda size, directory: gaussian(size),
+        lambda x, y: plotter.sweep_analyse(x, y, level=-3), None),
+    "sweep_analyse target depth=3 comb": (
+        lambda size, directory: comb(size),
+        lambda x, y: plotter.sweep_analyse(x, y, target_x=1550., level=3, comparator=np.less, depth=3), 1e6),
+    "sweep_analyse_batch 16 traces comb": (
+        lambda size, directory: (comb(size)[0], np.array([comb(size, seed=seed)[1] for seed in range(16)])),
+        lambda x, y: plotter.sweep_analyse_batch(x, y, level=3, comparator=np.less), 1e6),
+    "find_bandwidth gaussian": (
+        lambda size, directory: gaussian(size) + ((1550., 0.),),
+        lambda x, y, extremum: plotter.find_bandwidth(x, y, -3, extremum, interp=True), None),
+    "find_bandwidth_side gaussian": (
+        lambda size, directory: (lambda x, y: (x[len(x)//2:], y[len(y)//2:]))(*gaussian(size)),
+        lambda x, y: plotter.find_bandwidth_side(x, y, y[0] - 3, -3, (x[0], y[0]), interp=True), None),
+    "find_peaks_table 200 dips comb": (
+        lambda size, directory: comb(size),
+        lambda x, y: plotter.find_peaks_table(x, y, level=3, comparator=np.less), None),
+    "column_statistics": (
+        lambda size, directory: (gaussian(size)[1],),
+        plotter.column_statistics, None),
+    "MinMaxPyramid build + decimate": (
+        lambda size, directory: (comb(size)[1],),
+        lambda y: plotter.MinMaxPyramid(y).decimate(nb_points=4000), None),
+    "data_to_dataframe array": (
+        lambda size, directory: (np.column_stack(gaussian(size)),),
+        plotter.data_to_dataframe, None),
+    "data_to_dataframe strings": (
+        lambda size, directory: (pd.DataFrame(np.column_stack(gaussian(size))).astype(str),),
+        plotter.data_to_dataframe, 1e6),
+    "importData csv": (
+        lambda size, directory: (write_csv(directory, size),),
+        plotter.importData, 1e6),
+    "importData npy": (
+        lambda size, directory: (write_npy(directory, size),),
+        lambda filename: plotter.importData(filename)["1"].sum(), None),
+    "Driver.append_data 1000 rows": (
+        lambda size, directory: (plotter.Driver(), gaussian(size)),
+        lambda driver, data: [driver.append_data({"x": x, "y": y}) for x, y in zip(*(column[:1000] for column in data))], None),
+}
+
+
+def run_benchmark(name, size, repeat, directory, all_sizes=False):
+    setup, function, max_size = BENCHMARKS[name]
+    if not all_sizes and max_size is not None and size > max_size:
+        return None
+
+    times = []
+    for _ in range(repeat):
+        args = setup(size, directory)
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+        del args
+
+    args = setup(size, directory)
+    tracemalloc.start()
+    try:
+        function(*args)
+        memory_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"benchmark": name, "size": int(size), "best_s": min(times),
+            "median_s": float(np.median(times)), "memory_peak_MB": memory_peak / 2**20}
+
+
+def read_results(filename) -> dict:
+    with open(filename, newline="") as fp:
+        return {(row["benchmark"], int(row["size"])): float(row["best_s"]) for row in csv.DictReader(fp)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the plotter analysis functions on synthetic spectra")
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1e3, 1e4, 1e5, 1e6],
+                        help="number of points of the spectra (up to 1e7)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the best time is reported")
+    parser.add_argument("-k", dest="filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--all-sizes", action="store_true", help="also run the slow benchmarks on the largest sizes")
+    parser.add_argument("--output", help="write the results to this CSV file")
+    parser.add_argument("--compare", help="CSV file of a previous run to compare the best times with")
+    options = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if options.filter.lower() in name.lower()]
+    reference = read_results(options.compare) if options.compare else {}
+
+    results = []
+    print(f"{'benchmark':<38}{'size':>10}{'best (ms)':>12}{'median (ms)':>13}{'memory (MB)':>13}"
+          + (f"{'ratio':>8}" if reference else ""))
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            for size in options.sizes:
+                result = run_benchmark(name, size, options.repeat, directory, options.all_sizes)
+                if result is None:
+                    continue
+                results.append(result)
+                line = (f"{name:<38}{result['size']:>10}{result['best_s']*1e3:>12.3f}"
+                        f"{result['median_s']*1e3:>13.3f}{result['memory_peak_MB']:>13.1f}")
+                if (name, result["size"]) in reference:
+                    line += f"{result['best_s'] / reference[(name, result['size'])]:>8.2f}"
+                print(line, flush=True)
+
+    if options.output:
+        with open(options.output, "w", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=list(results[0]) if results else ["benchmark"])
+            writer.writeheader()
+            writer.writerows(results)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
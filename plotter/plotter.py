@@ -7,7 +7,10 @@ Created on Mon Jun 13 21:26:10 2022
 category = "Plotter"
 
 import csv
+import io
+import os
 import sys
+import zlib
 
 import numpy as np
 import pandas as pd
@@ -19,46 +22,61 @@ except:
 
 _import_once = True
 
+HEAD_SIZE = 65536  # characters read once to sniff the file format
+_sniff_cache = {}  # absolute path -> (mtime, size, (sep, header, skiprows, columns))
+_SNIFF_CACHE_SIZE = 1024
 
-def find_delimiter(filename):
-    sniffer = csv.Sniffer()
+LARGE_FILE_SIZE = 256 * 2**20  # text files bigger than that (bytes) are read by chunks into a single array
+CHUNK_SIZE = 2**20  # rows read or reduced at once
+MAX_ANALYSIS_POINTS = 2**21  # the bandwidth search runs on a min/max decimated view above that
+
+
+def _read_head(filename, size=HEAD_SIZE):
     with open(filename) as fp:
-        try:
-            text = fp.read(5000)
-            if text.startswith("#"):
-                text = text[len(text.split("\n")[0])+len("\n"):]
-            delimiter = sniffer.sniff(text).delimiter
-        except:
-            # delimiter = ","  # only 1 column
-            delimiter = no_default
-        if delimiter in ("e", "."):  # sniffer got it wrong
-            delimiter = no_default
+        return fp.read(size)
+
+
+def find_delimiter(filename, head=None):
+    sniffer = csv.Sniffer()
+    text = _read_head(filename, 5000) if head is None else head[:5000]
+    try:
+        if text.startswith("#"):
+            text = text[len(text.split("\n")[0])+len("\n"):]
+        delimiter = sniffer.sniff(text).delimiter
+    except:
+        # delimiter = ","  # only 1 column
+        delimiter = no_default
+    if delimiter in ("e", "."):  # sniffer got it wrong
+        delimiter = no_default
     return delimiter
 
 
-def _skiprows(filename):
-    with open(filename) as fp:
-        if fp.read(1) not in ("#", "!", "\n"):
-            skiprows = None
-        else:
-            skiprows = 1
-            fp.readline()
-            while fp.read(1) in ("#", "!", "\n"):
-                skiprows += 1
-                fp.readline()
+def _skiprows(filename, head=None):
+    lines = iter((_read_head(filename) if head is None else head).splitlines(True))
+    line = next(lines, "")
+    if line[:1] not in ("#", "!", "\n"):
+        skiprows = None
+    else:
+        skiprows = 1
+        for line in lines:
+            if line[:1] not in ("#", "!", "\n"):
+                break
+            skiprows += 1
     return skiprows
 
 
-def find_header(filename, sep=no_default, skiprows=None):
+def find_header(filename, sep=no_default, skiprows=None, head=None):
+    """ head: beginning of the file, used instead of reading the file for each probe """
+    source = (lambda: filename) if head is None else (lambda: io.StringIO(head))
     try:
-        df = pd.read_csv(filename, sep=sep, header=None, nrows=5, skiprows=skiprows)
+        df = pd.read_csv(source(), sep=sep, header=None, nrows=5, skiprows=skiprows)
     except Exception:
         if type(skiprows) is not None: skiprows += 1
-        df = pd.read_csv(filename, sep=sep, header=None, nrows=5, skiprows=skiprows)
+        df = pd.read_csv(source(), sep=sep, header=None, nrows=5, skiprows=skiprows)
     else:
         if skiprows == 1:
             try:
-                df_columns = pd.read_csv(filename, sep=sep, header="infer", skiprows=0, nrows=0)
+                df_columns = pd.read_csv(source(), sep=sep, header="infer", skiprows=0, nrows=0)
             except Exception:
                 pass
             else:
@@ -73,11 +91,38 @@ def find_header(filename, sep=no_default, skiprows=None):
         return ("infer", skiprows, no_default) if tuple(first_row) == tuple([i for i in range(len(first_row))]) else (None, skiprows, no_default)
     except:
         pass
-    df_header = pd.read_csv(filename, sep=sep, nrows=5, skiprows=skiprows)
+    df_header = pd.read_csv(source(), sep=sep, nrows=5, skiprows=skiprows)
 
     return ("infer", skiprows, no_default) if tuple(df.dtypes) != tuple(df_header.dtypes) else (None, skiprows, no_default)
 
 
+def sniff_file(filename):
+    """ Return (sep, header, skiprows, columns) to read filename with pd.read_csv.
+    The format is guessed from a single read of the beginning of the file and
+    kept until the file is modified. """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    cached = _sniff_cache.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    head = _read_head(path)
+    if len(head) == HEAD_SIZE:  # keep complete lines only
+        head = head[:head.rfind("\n")+1]
+
+    skiprows = _skiprows(path, head)
+    sep = find_delimiter(path, head)
+    if head.count("\n") < (skiprows or 0) + 6:  # lines too long for the probes to fit in head
+        head = None
+    (header, skiprows, columns) = find_header(path, sep, skiprows, head)
+    result = (sep, header, skiprows, columns)
+
+    if len(_sniff_cache) >= _SNIFF_CACHE_SIZE:
+        _sniff_cache.pop(next(iter(_sniff_cache)))
+    _sniff_cache[path] = (stat.st_mtime_ns, stat.st_size, result)
+    return result
+
+
 def data_to_dataframe(data):
     """ Format data """
     try:
@@ -88,7 +133,9 @@ def data_to_dataframe(data):
     data_type = data.values.dtype
 
     try:
-        data[data.columns] = data[data.columns].apply(pd.to_numeric, errors="coerce")
+        to_convert = [column for column, dtype in data.dtypes.items() if not pd.api.types.is_numeric_dtype(dtype)]
+        if to_convert:
+            data[to_convert] = data[to_convert].apply(pd.to_numeric, errors="coerce")
     except ValueError:
         pass  # OPTIMIZE: This happens when their is identical column name
     if len(data) != 0:
@@ -101,12 +148,400 @@ def data_to_dataframe(data):
     return data
 
 
+def array_fingerprint(values):
+    """ Return (shape, dtype, checksum) of a numeric array, None for object arrays.
+    Only a non-contiguous array is copied to be checksummed """
+    values = np.asarray(values)
+    if values.dtype.hasobject:
+        return None
+    if not values.flags.c_contiguous:
+        values = np.ascontiguousarray(values)
+    return (values.shape, values.dtype.str, zlib.crc32(memoryview(values).cast('B')))
+
+
+def data_fingerprint(data):
+    """ Return a cheap identifier of data content (shape, dtype, checksum),
+    None if it can't be computed (object arrays, ...). A DataFrame is
+    checksummed column by column on views of its values, without building
+    the consolidated array of all its columns """
+    try:
+        if isinstance(data, pd.DataFrame):
+            fingerprints = tuple(array_fingerprint(data.iloc[:, i].to_numpy()) for i in range(data.shape[1]))
+            if None in fingerprints:
+                return None
+            return (type(data), tuple(data.columns), len(data), fingerprints)
+        fingerprint = array_fingerprint(data)
+    except Exception:
+        return None
+    return None if fingerprint is None else (type(data),) + fingerprint
+
+
+def array_to_dataframe(array, name="1"):
+    """ Wrap a numeric 1D or 2D array (possibly memory-mapped) in a DataFrame
+    without copying it. A 1D array gets an index column like data_to_dataframe. """
+    if array.ndim == 1:
+        index = np.arange(len(array), dtype=np.int32 if len(array) < 2**31 else np.int64)
+        return pd.DataFrame({"0": index, name: array}, copy=False)
+    assert array.ndim == 2, f"Can't open array of dimension {array.ndim}"
+    return pd.DataFrame(array, columns=[str(i) for i in range(array.shape[1])], copy=False)
+
+
+def load_npy(filename):
+    """ Memory-map a .npy file: data is read from disk only when used """
+    array = np.load(filename, mmap_mode="r")
+    assert array.dtype.kind in "biuf", f"Datatype '{array.dtype}' not supported"
+    return array_to_dataframe(array)
+
+
+def load_csv_chunked(filename):
+    """ Read a large text file by chunks of CHUNK_SIZE rows into a single float array,
+    to avoid the copies of read_csv + data_to_dataframe """
+    (sep, header, skiprows, columns) = sniff_file(filename)
+    head = _read_head(filename)
+    nb_rows_estimate = int(os.path.getsize(filename) / (len(head) / max(head.count("\n"), 1)) * 1.1) + 1
+
+    reader = pd.read_csv(filename, sep=sep, header=header, skiprows=skiprows,
+                         names=columns, chunksize=CHUNK_SIZE)
+    array = None
+    length = 0
+    with reader:
+        for chunk in reader:
+            values = chunk.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+            if array is None:
+                names = [str(name) for name in chunk.columns]
+                array = np.empty((max(nb_rows_estimate, len(values)), values.shape[1]))
+            if length + len(values) > len(array):
+                array.resize((int(1.5*(length + len(values))), array.shape[1]), refcheck=False)
+            array[length:length+len(values)] = values
+            length += len(values)
+
+    assert length != 0, "Can't import empty DataFrame"
+    if np.isnan(array[length-1]).all():  # if last line is full of nan, remove it
+        length -= 1
+    array.resize((length, array.shape[1]), refcheck=False)  # shrinks in place
+
+    if array.shape[1] == 1:
+        return array_to_dataframe(array[:, 0], "1" if names[0] == "0" else names[0])
+    return pd.DataFrame(array, columns=names, copy=False)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def rows_to_columns(data) -> dict:
+    """ Format rows given to append_data as {column: float array}. Unlike
+    data_to_dataframe, rows of nan are kept and a single column doesn't get
+    an index column (the AppendBuffer numbers the rows itself).
+    A dict of scalars (a single row) doesn't go through a DataFrame. """
+    if isinstance(data, dict) and all(np.ndim(value) == 0 for value in data.values()):
+        return {str(name): np.array([_to_float(value)]) for name, value in data.items()}
+    try:
+        data = pd.DataFrame(data)
+    except ValueError:
+        data = pd.DataFrame([data])
+    columns = {str(name): pd.to_numeric(data[name], errors="coerce").to_numpy(dtype=float)
+               for name in data.columns}
+    if list(columns) == ["0"]:
+        columns = {"1": columns["0"]}
+    return columns
+
+
+class AppendBuffer:
+    """ Float columns growing by amortized doubling, so appending rows costs
+    O(new rows) instead of the O(length) of a pd.concat. With max_length the
+    oldest rows are dropped (ring buffer).
+    Written rows are never modified: when the storage is full a new one is
+    allocated, so the DataFrames returned by snapshot stay valid while rows
+    are appended. """
+
+    MIN_CAPACITY = 1024
+
+    def __init__(self, max_length=0):
+        self.columns = None
+        self.max_length = int(max_length)  # 0 for no limit
+        self.total = 0  # rows appended since creation
+        self._arrays = {}
+        self._begin = self._end = 0  # rows kept in the arrays
+
+    def __len__(self):
+        return self._end - self._begin
+
+    @property
+    def start(self) -> int:
+        """ Number of rows dropped, i.e. index since creation of the first row kept """
+        return self.total - len(self)
+
+    def _reallocate(self, keep, capacity):
+        """ Copy the last keep rows at the beginning of new arrays """
+        arrays = {}
+        for name, array in self._arrays.items():
+            arrays[name] = np.empty(capacity)
+            arrays[name][:keep] = array[self._end-keep:self._end]
+        self._arrays = arrays
+        self._begin, self._end = 0, keep
+
+    def set_max_length(self, value):
+        value = int(value)
+        assert value >= 0, "Max length must be positive or 0"
+        self.max_length = value
+        if self.columns is not None:
+            keep = min(len(self), value) if value else len(self)
+            self._reallocate(keep, 2*value if value else max(2*keep, self.MIN_CAPACITY))
+
+    def append(self, rows: dict):
+        """ Append rows given as {column: array}. The first rows define the
+        columns, missing columns are filled with nan (with the row number for
+        the index column '0' added to single column data) """
+        if self.columns is None:
+            self.columns = list(rows)
+            if len(self.columns) == 1 and self.columns[0] != "0":
+                self.columns.insert(0, "0")
+            self._arrays = {name: np.empty(0) for name in self.columns}
+        unknown = [name for name in rows if name not in self._arrays]
+        assert not unknown, f"Columns {unknown} not in data columns {self.columns}"
+
+        nb_rows = len(next(iter(rows.values()), ()))
+        if nb_rows == 0:
+            return
+        values = {}
+        for name in self.columns:
+            if name in rows:
+                values[name] = np.asarray(rows[name], dtype=float)
+                assert len(values[name]) == nb_rows, "All columns must have the same length"
+            elif name == "0":
+                values[name] = np.arange(self.total, self.total + nb_rows, dtype=float)
+            else:
+                values[name] = np.full(nb_rows, np.nan)
+
+        if self.max_length and nb_rows >= self.max_length:
+            values = {name: value[-self.max_length:] for name, value in values.items()}
+            self._reallocate(0, 2*self.max_length)
+        elif self._end + nb_rows > len(self._arrays[self.columns[0]]):
+            keep = min(len(self), self.max_length - nb_rows) if self.max_length else len(self)
+            capacity = 2*self.max_length if self.max_length else max(2*(keep + nb_rows), self.MIN_CAPACITY)
+            self._reallocate(keep, capacity)
+
+        length = len(values[self.columns[0]])
+        for name, value in values.items():
+            self._arrays[name][self._end:self._end+length] = value
+        self._end += length
+        if self.max_length:
+            self._begin = max(self._begin, self._end - self.max_length)
+        self.total += nb_rows
+
+    def snapshot(self) -> pd.DataFrame:
+        """ DataFrame of the rows kept, without copy """
+        if self.columns is None:
+            return pd.DataFrame()
+        return pd.DataFrame({name: self._arrays[name][self._begin:self._end] for name in self.columns},
+                            copy=False)
+
+
+class RunningStatistics:
+    """ count, min, argmin, max, argmax, mean and std (ddof=0) of a column
+    ignoring nan, updated in O(new values) when values are appended.
+    argmin and argmax are positions in the column. """
+
+    window = 0  # whole column
+
+    def __init__(self):
+        self.length = 0  # values seen, nan included
+        self.count = 0  # values seen, nan excluded
+        self.min = self.max = np.nan
+        self.argmin = self.argmax = None
+        self._mean = self._m2 = 0.
+
+    def update(self, values, chunk_size=CHUNK_SIZE):
+        """ Add values at the end of the column, by chunks so a large
+        memory-mapped column is never copied whole """
+        for start in range(0, len(values), chunk_size):
+            self._update_chunk(np.asarray(values[start:start+chunk_size], dtype=float))
+        return self
+
+    def _update_chunk(self, chunk):
+        nan = np.isnan(chunk)
+        valid = chunk[~nan] if nan.any() else chunk
+        if valid.size != 0:
+            index = np.nanargmin(chunk)
+            if not chunk[index] >= self.min:  # also true while min is nan
+                self.min, self.argmin = chunk[index], self.length + index
+            index = np.nanargmax(chunk)
+            if not chunk[index] <= self.max:
+                self.max, self.argmax = chunk[index], self.length + index
+
+            # merge chunk mean and sum of squares (Welford / Chan et al.)
+            count = self.count + valid.size
+            chunk_mean = valid.mean()
+            delta = chunk_mean - self._mean
+            self._m2 += ((valid - chunk_mean)**2).sum() + delta**2 * self.count * valid.size / count
+            self._mean += delta * valid.size / count
+            self.count = count
+        self.length += len(chunk)
+
+    def result(self) -> dict:
+        return {"count": self.count, "min": self.min, "argmin": self.argmin, "max": self.max, "argmax": self.argmax,
+                "mean": self._mean if self.count else np.nan,
+                "std": np.sqrt(self._m2 / self.count) if self.count else np.nan}
+
+
+class RollingStatistics:
+    """ Same statistics as RunningStatistics over the last window values of the column.
+    Mean and std are updated in O(new values), min and max in O(window) once per update. """
+
+    def __init__(self, window):
+        self.window = int(window)
+        assert self.window > 0, "Window must be positive"
+        self.length = 0
+        self._buffer = np.full(self.window, np.nan)  # ring buffer, value i of the column at i % window
+        self._shift = 0.  # sums are of (value - shift) to keep var = E[x²] - E[x]² accurate
+        self._count = 0
+        self._sum = self._sum2 = 0.
+        self._since_resum = 0
+        self._result = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) >= self.window:
+            self._buffer[(self.length + len(values) - self.window + np.arange(self.window)) % self.window] = values[-self.window:]
+            self.length += len(values)
+            self._resum()
+        elif len(values) != 0:
+            positions = (self.length + np.arange(len(values))) % self.window
+            old = self._buffer[positions] - self._shift
+            new = values - self._shift
+            self._count += np.count_nonzero(~np.isnan(new)) - np.count_nonzero(~np.isnan(old))
+            self._sum += np.nansum(new) - np.nansum(old)
+            self._sum2 += np.nansum(new**2) - np.nansum(old**2)
+            self._buffer[positions] = values
+            self.length += len(values)
+            self._since_resum += len(values)
+            if self._since_resum >= self.window:  # bound the rounding errors of the running sums
+                self._resum()
+        self._result = None
+        return self
+
+    def _resum(self):
+        valid = self._buffer[~np.isnan(self._buffer)]
+        self._shift = valid.mean() if valid.size else 0.
+        self._count = valid.size
+        self._sum = (valid - self._shift).sum()
+        self._sum2 = ((valid - self._shift)**2).sum()
+        self._since_resum = 0
+
+    def _position(self, index):
+        """ Position in the column of the ring buffer index """
+        first = self.length - min(self.length, self.window)
+        return first + (index - first) % self.window
+
+    def result(self) -> dict:
+        if self._result is None:
+            result = {"count": self._count, "min": np.nan, "argmin": None, "max": np.nan, "argmax": None,
+                      "mean": np.nan, "std": np.nan}
+            if self._count:
+                index = np.nanargmin(self._buffer)
+                result["min"], result["argmin"] = self._buffer[index], self._position(index)
+                index = np.nanargmax(self._buffer)
+                result["max"], result["argmax"] = self._buffer[index], self._position(index)
+                mean = self._sum / self._count
+                result["mean"] = self._shift + mean
+                result["std"] = np.sqrt(max(self._sum2 / self._count - mean**2, 0.))
+            self._result = result
+        return self._result
+
+
+def column_statistics(values, chunk_size=CHUNK_SIZE) -> dict:
+    """ Return count, min, argmin, max, argmax, mean and std (ddof=0) of values ignoring nan """
+    return RunningStatistics().update(values, chunk_size).result()
+
+
+def minmax_decimate(values, nb_points):
+    """ Return the sorted indexes of about nb_points points of values keeping
+    the min and max of consecutive blocks, so peaks survive the decimation """
+    length = len(values)
+    nb_blocks = max(nb_points // 2, 1)
+    block = -(-length // nb_blocks)
+    if block <= 2:
+        return np.arange(length)
+
+    full = (length // block) * block
+    blocks = np.asarray(values[:full]).reshape(-1, block)
+    starts = np.arange(0, full, block)
+    index = [starts + blocks.argmin(axis=1), starts + blocks.argmax(axis=1)]
+    if full != length:
+        tail = np.asarray(values[full:])
+        index.append(full + np.array([tail.argmin(), tail.argmax()]))
+
+    return np.unique(np.concatenate(index))
+
+
+class MinMaxPyramid:
+    """ Level of detail of a column for display: for blocks of BASE_BLOCK,
+    2*BASE_BLOCK, 4*BASE_BLOCK, ... values, the indexes of the min and max of
+    each block. Built once in O(n), then a decimated view of any range costs
+    O(nb_points) instead of O(range). """
+
+    BASE_BLOCK = 64
+
+    def __init__(self, values):
+        self.values = values
+        self.levels = []  # (block size, argmin of each block, argmax of each block)
+        length = len(values)
+        block = self.BASE_BLOCK
+        full = (length // block) * block
+        if full == 0:
+            return
+        blocks = np.asarray(values[:full]).reshape(-1, block)
+        starts = np.arange(0, full, block)
+        imin, imax = starts + blocks.argmin(axis=1), starts + blocks.argmax(axis=1)
+        self.levels.append((block, imin, imax))
+
+        while len(imin) > 1:
+            pairs = (len(imin) // 2) * 2
+            first, second = imin[0:pairs:2], imin[1:pairs:2]
+            imin = np.where(self.values[second] < self.values[first], second, first)
+            first, second = imax[0:pairs:2], imax[1:pairs:2]
+            imax = np.where(self.values[second] > self.values[first], second, first)
+            block *= 2
+            self.levels.append((block, imin, imax))
+
+    def decimate(self, start=0, stop=None, nb_points=4000):
+        """ Return the sorted indexes of about nb_points points in values[start:stop]
+        keeping the min and max of consecutive blocks like minmax_decimate """
+        stop = len(self.values) if stop is None else min(stop, len(self.values))
+        start = max(start, 0)
+        if stop - start <= nb_points:
+            return np.arange(start, stop)
+
+        # smallest block giving at most nb_points (plus the min and max of the two partial blocks at the ends)
+        block_wanted = (stop - start) / max(nb_points // 2, 1)
+        if not self.levels or block_wanted < self.levels[0][0]:  # range too short for the levels
+            return start + minmax_decimate(self.values[start:stop], nb_points)
+        level = next((candidate for candidate in self.levels if candidate[0] >= block_wanted), self.levels[-1])
+
+        (block, imin, imax) = level
+        first, last = -(-start // block), stop // block  # blocks entirely in the range
+        index = [imin[first:last], imax[first:last]]
+        for (edge_start, edge_stop) in ((start, min(first*block, stop)), (max(last*block, start), stop)):
+            if edge_stop > edge_start:  # part of a block at each end
+                edge = np.asarray(self.values[edge_start:edge_stop])
+                index.append(edge_start + np.array([edge.argmin(), edge.argmax()]))
+
+        return np.unique(np.concatenate(index))
+
+
 def importData(filename):
     """ This function open the data with the provided filename """
 
-    skiprows = _skiprows(filename)
-    sep = find_delimiter(filename)
-    (header, skiprows, columns) = find_header(filename, sep, skiprows)
+    if os.path.splitext(filename)[1].lower() == ".npy":
+        return load_npy(filename)
+    if os.path.getsize(filename) > LARGE_FILE_SIZE:
+        return load_csv_chunked(filename)
+
+    (sep, header, skiprows, columns) = sniff_file(filename)
     try:
         data = pd.read_csv(filename, sep=sep, header=header, skiprows=skiprows, names=columns)
     except TypeError:
@@ -172,6 +607,16 @@ class Driver :
         self.x_label = ""
         self.y_label = ""
         self.isDisplayCursor = False
+        self._data_fingerprint = None  # data given to the last refresh
+        self._data_version = 0  # incremented each time self.data is replaced
+        self._bandwidth_settings = None  # settings and data version of the last bandwidth search
+        self._statistics = {}  # RunningStatistics or RollingStatistics of self.data by (label, window)
+        self._pyramids = {}  # MinMaxPyramid of self.data by label
+        self.display_points = 4000  # about twice the width of a screen in pixels
+        self.statistics_window = 0  # statistics over the last values only if not 0
+        self._buffer = None  # AppendBuffer holding self.data since the first append_data
+        self._data_start = 0  # rows of the appended data dropped by the buffer
+        self.max_length = 0  # keep only the last rows appended if not 0
 
         self.info = DataModule(self)
         self.min = MinModule(self)
@@ -227,7 +672,77 @@ class Driver :
             return str(list(self.data.keys()))
 
     def get_data(self):
-        return pd.DataFrame(self.data)
+        return pd.DataFrame(self.data, copy=False)
+
+    def get_statistics(self, label, window=None) -> dict:
+        """ Return the statistics of the column label (see RunningStatistics),
+        over its last window values if not 0 (statistics_window by default).
+        Only values added since the previous call are processed. """
+        column = self.data[label].to_numpy()
+        key = (label, self.statistics_window if window is None else window)
+        window = key[1]
+        if self._data_start and self.max_length:  # the buffer drops rows: only the last max_length rows are in data
+            window = min(window or self.max_length, self.max_length)
+        start = self._data_start  # the accumulators count rows since the first one appended
+        accumulator = self._statistics.get(key)
+        if accumulator is None or accumulator.window != window \
+                or not start <= accumulator.length <= start + len(column):
+            accumulator = RollingStatistics(window) if window else RunningStatistics()
+            accumulator.length = start
+            self._statistics[key] = accumulator
+        if start + len(column) > accumulator.length:
+            accumulator.update(column[accumulator.length-start:])
+
+        result = accumulator.result()
+        if start and result["argmin"] is not None:
+            result = dict(result, argmin=result["argmin"]-start, argmax=result["argmax"]-start)
+        return result
+
+    def get_pyramid(self, label) -> MinMaxPyramid:
+        """ Return the level of detail pyramid of the column label, built once per data """
+        if label not in self._pyramids:
+            self._pyramids[label] = MinMaxPyramid(self.data[label].to_numpy())
+        return self._pyramids[label]
+
+    def get_display_data(self, x_range=None) -> pd.DataFrame:
+        """ Return about display_points rows of x_label and y_label to plot,
+        keeping the min and max of y on each interval. x_range=(x_min, x_max)
+        only returns the rows displayed in this range (x must be sorted) """
+        if len(self.data) == 0 or not self.x_label or not self.y_label:
+            return pd.DataFrame()
+        start, stop = 0, len(self.data)
+        if x_range is not None:
+            x_data = self.data[self.x_label].to_numpy()
+            if x_data[0] <= x_data[-1]:
+                start, stop = np.searchsorted(x_data, x_range[0]), np.searchsorted(x_data, x_range[1], side='right')
+            else:  # decreasing order
+                start = len(x_data) - np.searchsorted(x_data[::-1], x_range[1], side='right')
+                stop = len(x_data) - np.searchsorted(x_data[::-1], x_range[0])
+            start, stop = max(start - 1, 0), min(stop + 1, len(x_data))  # a point outside the range on each side
+
+        index = self.get_pyramid(self.y_label).decimate(start, stop, self.display_points)
+        if len(index) != 0:  # the curve must reach the edges of the range
+            index = np.union1d(index, [start, stop - 1])
+        columns = [self.x_label] if self.x_label == self.y_label else [self.x_label, self.y_label]
+        return self.data[columns].iloc[index]
+
+    def get_display_points(self) -> int:
+        return int(self.display_points)
+
+    def set_display_points(self, value):
+        """ Number of points returned by get_display_data """
+        value = int(value)
+        assert value > 0, "Number of points must be positive"
+        self.display_points = value
+
+    def get_statistics_window(self) -> int:
+        return int(self.statistics_window)
+
+    def set_statistics_window(self, value):
+        """ Compute min/max/mean/std over the last value points only, 0 for all data """
+        value = int(value)
+        assert value >= 0, "Window must be positive or 0"
+        self.statistics_window = value
 
 
     def set_data(self, value):
@@ -237,6 +752,44 @@ class Driver :
         self._open(df)
 
 
+    def append_data(self, value):
+        """  Add rows at the end of data. Data is kept in an AppendBuffer so
+        the cost of an append doesn't grow with the length of data """
+        rows = rows_to_columns(value)
+        if self._buffer is None:
+            self._buffer = AppendBuffer(self.max_length)
+            if len(self.data.columns) != 0:
+                self._buffer.append({str(name): self.data[name].to_numpy() for name in self.data.columns})
+        is_new = self._buffer.columns is None
+        self._buffer.append(rows)
+        self._update_appended()
+
+        if is_new:
+            self.set_x_label(self.data.keys()[0])
+            self.set_y_label(self.data.keys()[-1])
+
+    def _update_appended(self):
+        """ Publish the rows of the buffer. Analysis modules get a new
+        DataFrame, unchanged by later appends. """
+        self.data = self._buffer.snapshot()
+        self._data_start = self._buffer.start
+        self.bandwidth.clear_cache()
+        self._pyramids = {}
+        self._data_fingerprint = None
+        self._data_version += 1
+
+    def get_max_length(self) -> int:
+        return int(self.max_length)
+
+    def set_max_length(self, value):
+        """ Keep only the last value rows added by append_data, 0 for no limit """
+        value = int(value)
+        assert value >= 0, "Max length must be positive or 0"
+        self.max_length = value
+        if self._buffer is not None:
+            self._buffer.set_max_length(value)
+            self._update_appended()
+
     def open(self, filename):
         """  Open data from file """
 
@@ -248,6 +801,13 @@ class Driver :
         """  Add data to dict """
 
         self.data = df
+        self._buffer = None
+        self._data_start = 0
+        self.bandwidth.clear_cache()
+        self._pyramids = {}
+        self._data_fingerprint = None
+        self._data_version += 1
+        self._statistics = {}
 
         try:
             self.set_x_label(df.keys()[0])
@@ -260,16 +820,26 @@ class Driver :
             self.set_y_label("")
 
     def refresh(self, data):
-        """ Called by plotter"""
+        """ Called by plotter.
+        Data is only reformatted if it changed since last call and the
+        bandwidth only searched again if data or its settings changed """
 
         if self.gui:
-            self.set_data(data)
+            if data is not self.data:
+                fingerprint = data_fingerprint(data)
+                if fingerprint is None or fingerprint != self._data_fingerprint:
+                    self.set_data(data)
+                    self._data_fingerprint = fingerprint
 
             if self.isDisplayCursor:
                 target_x = self.bandwidth.target_x
                 level = self.bandwidth.level
                 comparator = self.bandwidth._comparator
                 depth = self.bandwidth.depth
+                settings = (target_x, level, comparator, depth, self.x_label, self.y_label, self._data_version)
+                if settings == self._bandwidth_settings:
+                    return
+                self._bandwidth_settings = settings
                 try:
                     self.bandwidth.search_bandwitdh(target_x, level=level, comparator=comparator, depth=depth)
                 except Exception as error:
@@ -278,6 +848,7 @@ class Driver :
                     else:
                         self.gui.setStatus(f"Can't display markers: {error}",10000, False)
             else:
+                self._bandwidth_settings = None
                 self.displayCursors([(None,None)]*3)
 
     def refresh_gui(self):
@@ -300,17 +871,17 @@ class Driver :
             (left, extremum, right) = cursors_coordinate
 
             if len(self.data) != 0:
+                # bounds on all data, whatever statistics_window
                 if self.x_label == self.y_label:
-                    x_data = np.array(self.data.values[:,0])
-                    y_data = x_data
+                    x_stats = y_stats = self.get_statistics(self.data.columns[0], window=0)
                 else:
-                    x_data = self.data[self.x_label]
-                    y_data = self.data[self.y_label]
+                    x_stats = self.get_statistics(self.x_label, window=0)
+                    y_stats = self.get_statistics(self.y_label, window=0)
 
-                bounds_vertical = [np.nextafter(x_data.min(), x_data.min()-1),
-                                   np.nextafter(x_data.max(), x_data.max()+1)]
-                bounds_horizontal = [np.nextafter(y_data.min(), y_data.min()-1),
-                                     np.nextafter(y_data.max(), y_data.max()+1)]
+                bounds_vertical = [np.nextafter(x_stats["min"], x_stats["min"]-1),
+                                   np.nextafter(x_stats["max"], x_stats["max"]+1)]
+                bounds_horizontal = [np.nextafter(y_stats["min"], y_stats["min"]-1),
+                                     np.nextafter(y_stats["max"], y_stats["max"]+1)]
 
                 self.cursor_left_vertical.setBounds(bounds_vertical)
                 self.cursor_right_vertical.setBounds(bounds_vertical)
@@ -392,6 +963,27 @@ class Driver :
                         'param_type':pd.DataFrame,
                         'help':'Add DataFrame to device. In GUI, use $eval:df with df being for example dummy.array_1D() or any other df from another device.'})
 
+        config.append({'element':'action','name':'append_data',
+                        'do':self.append_data,
+                        'param_type':pd.DataFrame,
+                        'help':'Add rows at the end of data, e.g. $eval:{"x": 1, "y": 2} or a DataFrame. Columns missing in the rows are filled with nan.'})
+
+        config.append({'element':'variable','name':'max_length','type':int,
+                       'read':self.get_max_length, 'write':self.set_max_length,
+                       "help": "Keep only the last max_length rows added by append_data. 0 for no limit"})
+
+        config.append({'element':'variable','name':'display_data','type':pd.DataFrame,
+                       'read':self.get_display_data,
+                       "help": "Return about display_points rows of x_label and y_label keeping the min and max of y, to plot large data"})
+
+        config.append({'element':'variable','name':'display_points','type':int,
+                       'read':self.get_display_points, 'write':self.set_display_points,
+                       "help": "Number of points returned by display_data"})
+
+        config.append({'element':'variable','name':'statistics_window','type':int,
+                       'read':self.get_statistics_window, 'write':self.set_statistics_window,
+                       "help": "Number of last points used by min, max, mean and std. 0 to use all data"})
+
         config.append({'element':'module','name':'min','object':getattr(self,'min')})
         config.append({'element':'module','name':'max','object':getattr(self,'max')})
         config.append({'element':'module','name':'mean','object':getattr(self,'mean')})
@@ -449,11 +1041,11 @@ class MinModule:
         self.analyzer = analyzer
 
     def x(self):
-        index = np.argmin(self.analyzer.data[self.analyzer.y_label])
-        return self.analyzer.data[self.analyzer.x_label][index]
+        index = self.analyzer.get_statistics(self.analyzer.y_label)["argmin"]
+        return self.analyzer.data[self.analyzer.x_label].iloc[index]
 
     def y(self):
-        return np.min(self.analyzer.data[self.analyzer.y_label])
+        return self.analyzer.get_statistics(self.analyzer.y_label)["min"]
 
 
     def get_driver_model(self):
@@ -479,11 +1071,11 @@ class MaxModule:
         self.analyzer = analyzer
 
     def x(self):
-        index = np.argmax(self.analyzer.data[self.analyzer.y_label])
-        return self.analyzer.data[self.analyzer.x_label][index]
+        index = self.analyzer.get_statistics(self.analyzer.y_label)["argmax"]
+        return self.analyzer.data[self.analyzer.x_label].iloc[index]
 
     def y(self):
-        return np.max(self.analyzer.data[self.analyzer.y_label])
+        return self.analyzer.get_statistics(self.analyzer.y_label)["max"]
 
 
     def get_driver_model(self):
@@ -509,10 +1101,10 @@ class MeanModule:
         self.analyzer = analyzer
 
     def x(self):
-        return np.mean(self.analyzer.data[self.analyzer.x_label])  # OPTIMIZE: if y_label has none, return wrong value
+        return self.analyzer.get_statistics(self.analyzer.x_label)["mean"]  # OPTIMIZE: if y_label has none, return wrong value
 
     def y(self):
-        return np.mean(self.analyzer.data[self.analyzer.y_label])
+        return self.analyzer.get_statistics(self.analyzer.y_label)["mean"]
 
 
     def get_driver_model(self):
@@ -539,10 +1131,10 @@ class StdModule:
         self.analyzer = analyzer
 
     def x(self):
-        return np.std(self.analyzer.data[self.analyzer.x_label])
+        return self.analyzer.get_statistics(self.analyzer.x_label)["std"]
 
     def y(self):
-        return np.std(self.analyzer.data[self.analyzer.y_label])
+        return self.analyzer.get_statistics(self.analyzer.y_label)["std"]
 
 
     def get_driver_model(self):
@@ -574,6 +1166,9 @@ class BandwidthModule:
         self.comparator = True
         self._comparator = np.greater
         self._remove_zero = False
+        self._x_index = None  # (x_label, y_label, sorted x, y) used by _get_y_from_x
+        self.min_depth = 0.
+        self._peaks = None  # (settings, table) of the last get_peaks
 
 
     def init_variables(self) -> dict:
@@ -608,6 +1203,33 @@ class BandwidthModule:
     def get_x_width(self):
         return abs(self.get_x_right() - self.get_x_left())
 
+    def clear_cache(self):
+        """ Forget the sorted x axis used by the cursors and the peaks table, called when data changes """
+        self._x_index = None
+        self._peaks = None
+
+    def _get_x_index(self, data):
+        """ Return x sorted in increasing order and the matching y, computed once per data and labels """
+        x_label = self.analyzer.x_label
+        y_label = self.analyzer.y_label
+
+        if self._x_index is None or self._x_index[:2] != (x_label, y_label):
+            x_data = np.asarray(data[x_label], dtype=float)
+            y_data = np.asarray(data[y_label], dtype=float)
+            keep = np.isfinite(x_data)
+            if not keep.all():
+                x_data, y_data = x_data[keep], y_data[keep]
+
+            if np.all(x_data[:-1] >= x_data[1:]):
+                x_data, y_data = x_data[::-1], y_data[::-1]
+            elif not np.all(x_data[:-1] <= x_data[1:]):
+                order = np.argsort(x_data, kind="stable")
+                x_data, y_data = x_data[order], y_data[order]
+
+            self._x_index = (x_label, y_label, x_data, y_data)
+
+        return self._x_index[2:]
+
     def _get_y_from_x(self, data, value):
 
         x_label = self.analyzer.x_label
@@ -616,20 +1238,20 @@ class BandwidthModule:
         if x_label == y_label:
             y_i = value  # assume same values for same key
         else:
-            # WARNING: bad because assume regular spacing
-            two_closest = data.iloc[(data[x_label] - value).abs().argsort()[:2]]
+            x_data, y_data = self._get_x_index(data)
 
-            x1 = two_closest[x_label].iloc[0]
-            x2 = two_closest[x_label].iloc[1]
-            y1 = two_closest[y_label].iloc[0]
-            y2 = two_closest[y_label].iloc[1]
+            if len(x_data) == 1:
+                return y_data[0]
+
+            # interpolate between the two points around value (extrapolate from the two last ones outside)
+            index = min(max(np.searchsorted(x_data, value), 1), len(x_data) - 1)
+            x1, x2 = x_data[index-1], x_data[index]
+            y1, y2 = y_data[index-1], y_data[index]
 
             if x2 == x1:
                 y_i = y1
             else:
-                a = (y2 - y1) / (x2 - x1)
-                b = y1 - a*x1
-                y_i = a*value + b
+                y_i = y1 + (y2 - y1) * (value - x1) / (x2 - x1)
 
         return y_i
 
@@ -675,6 +1297,35 @@ class BandwidthModule:
         self.analyzer.refresh(self.analyzer.data)
 
 
+    def get_min_depth(self):
+        """ This function returns the minimum depth of the peaks listed by get_peaks """
+
+        return float(self.min_depth)
+
+    def set_min_depth(self, value):
+        """ This function set the minimum depth of the peaks listed by get_peaks, 0 to use abs(level) """
+
+        self.min_depth = float(value)
+
+    def get_peaks(self) -> pd.DataFrame:
+        """ This function returns the table of all the peaks (or dips) with their bandwidth at level.
+        The table is computed once until data, labels, level, comparator or min_depth change """
+
+        settings = (self.analyzer.x_label, self.analyzer.y_label, self.level, self._comparator, self.min_depth)
+        if self._peaks is None or self._peaks[0] != settings:
+            data = self.analyzer.data
+            assert len(data) != 0, "Empty dataframe"
+            x_data = data[self.analyzer.x_label].to_numpy()
+            y_data = data[self.analyzer.y_label].to_numpy()
+            table = find_peaks_table(x_data, y_data, level=self.level, comparator=self._comparator,
+                                     prominence=self.min_depth if self.min_depth else None)
+            self._peaks = (settings, table)
+
+        return self._peaks[1]
+
+    def get_nb_peaks(self) -> int:
+        return len(self.get_peaks())
+
     def search_bandwitdh(self, target_x=-1, level="default", comparator="default", depth="default"):
         """ This function compute the bandwidth around target_x and return the x,y coordinate of the left, center and right"""
 
@@ -697,10 +1348,14 @@ class BandwidthModule:
 
         try:
             if variable_x == variable_y:
-                x_data = np.array(data.values[:,0])
+                x_data = data.iloc[:, 0].to_numpy()
                 y_data = x_data
             else:
-                x_data, y_data = np.array(data[variable_x]), np.array(data[variable_y])
+                x_data, y_data = data[variable_x].to_numpy(), data[variable_y].to_numpy()
+
+            if len(y_data) > MAX_ANALYSIS_POINTS:  # search on a view keeping the peaks
+                index = minmax_decimate(y_data, MAX_ANALYSIS_POINTS)
+                x_data, y_data = x_data[index], y_data[index]
 
             self.results = sweep_analyse(x_data, y_data, target_x=target_x, level=level, comparator=comparator, depth=depth, remove_zero=self._remove_zero)
 
@@ -778,6 +1433,22 @@ class BandwidthModule:
                        'type':float,
                        'help':'Set drop level in dB for the bandwidth'})
 
+        config.append({'element':'variable','name':'min_depth',
+                       'read':self.get_min_depth,
+                       'write':self.set_min_depth,
+                       'type':float,
+                       'help':'Set minimum depth of the peaks listed in peaks. 0 to use the level'})
+
+        config.append({'element':'variable','name':'nb_peaks',
+                       'read':self.get_nb_peaks,
+                       'type':int,
+                       'help':'Return the number of peaks found in data'})
+
+        config.append({'element':'variable','name':'peaks',
+                       'read':self.get_peaks,
+                       'type':pd.DataFrame,
+                       'help':'Return x, y, depth, x_left, x_right and width of every peak found in data (dips if comparator is False)'})
+
         return config
 
 
@@ -815,9 +1486,8 @@ def sweep_analyse(x_data, y_data, target_x=-1, level=-3, comparator=np.greater,
             point = {"x": extremum_filter[0], "y": extremum_filter[1]}
             data.append(point)
 
-        df = pd.DataFrame(data)
-
-        x_candidates = df['x'].mode().values  # wavelength with the most occurences (could have several wavelength with same occurance)
+        values, counts = np.unique([point["x"] for point in data], return_counts=True)
+        x_candidates = values[counts == counts.max()]  # wavelength with the most occurences (could have several wavelength with same occurance)
 
         index = abs(x_candidates - target_x).argmin()  # take wavelength closer to target_x if several x points found
         extremum_x = x_candidates[index]
@@ -844,6 +1514,167 @@ def sweep_analyse(x_data, y_data, target_x=-1, level=-3, comparator=np.greater,
     return results
 
 
+def sweep_analyse_batch(x_data, y_data, target_x=-1, level=-3, comparator=np.greater, depth=1):
+    """ Same as sweep_analyse for several traces sharing the same x axis.
+    y_data has shape (n_traces, n_points). Returns a dict with the same keys as
+    sweep_analyse where each (x, y) coordinate is a pair of arrays of length n_traces.
+    remove_zero is not available as it would give traces of different lengths. """
+    if comparator is True:
+       comparator = np.greater
+    elif comparator is False:
+       comparator = np.less
+    if comparator is not np.greater and comparator is not np.less:
+        raise TypeError(f"Comparator must be of type np.greater or np.less or bool. Given {comparator} of type {type(comparator)}")
+
+    x_data, y_data = np.asarray(x_data), np.atleast_2d(np.asarray(y_data))
+    assert y_data.shape[1] == len(x_data), f"y_data must have shape (n_traces, {len(x_data)}), got {y_data.shape}"
+
+    if np.all(x_data[:-1] >= x_data[1:]):  # change decreasing order to increasing
+        x_data = x_data[::-1]
+        y_data = y_data[:, ::-1]
+
+    assert np.all(x_data[:-1] <= x_data[1:]), "x axis is not sorted"
+
+    rows = np.arange(y_data.shape[0])
+
+    if target_x != -1:
+        order = lambda x: (((x-1) % 3)**2 + 1)*10**abs((x-1)//3)
+        order_array = order(np.arange(1, depth+1))
+        x_filter = np.array([x_data[_find_local_extremum_batch(x_data, y_data, target_x, level, order, comparator)]
+                             for order in order_array]).T  # (n_traces, depth)
+
+        # wavelength with the most occurences, the closest to target_x if several
+        counts = (x_filter[:, :, None] == x_filter[:, None, :]).sum(axis=2)
+        distance = np.where(counts == counts.max(axis=1, keepdims=True), abs(x_filter - target_x), np.inf)
+        closest = distance == distance.min(axis=1, keepdims=True)
+        extremum_x = np.where(closest, x_filter, np.inf).min(axis=1)
+        extremum_index = np.searchsorted(x_data, extremum_x)
+    elif comparator is np.greater:
+        extremum_index = np.argmax(y_data, axis=1)
+    else:
+        extremum_index = np.argmin(y_data, axis=1)
+
+    extremum = (x_data[extremum_index], y_data[rows, extremum_index])
+    bandwidth_left, bandwidth_right = _find_bandwidth_batch(x_data, y_data, level, extremum_index, interp=True)[:2]
+
+    return {"left": bandwidth_left, "extremum": extremum, "right": bandwidth_right}
+
+
+def _find_local_extremum_batch(x_data, y_data, target_x, level, order, comparator):
+    """ find_local_extremum for all the rows of y_data, returns the extremum indexes """
+    n_points = y_data.shape[1]
+
+    candidates = _relative_extremum_mask(y_data, comparator, order)
+    if n_points > 1:
+        candidates[:, -1] |= y_data[:, -1] > y_data[:, -2]
+        candidates[:, 0] |= y_data[:, 0] > y_data[:, 1]
+
+    distance = np.where(candidates, abs(x_data - target_x), np.inf)
+    filter_index = np.where(candidates.any(axis=1), distance.argmin(axis=1), np.argmax(y_data, axis=1))
+
+    # like find_extremum_from_extremum_filter: extremum inside the uninterpolated bandwidth
+    left_index, right_index = _find_bandwidth_batch(x_data, y_data, level, filter_index, interp=False)[2:]
+    low = np.searchsorted(x_data, x_data[left_index], side='right') - 1
+    high = np.searchsorted(x_data, x_data[right_index], side='left')
+    high = np.where(high == 0, n_points - 1, high)
+
+    index = np.arange(n_points)
+    inside = (index >= low[:, None]) & (index <= high[:, None])
+    fill = -np.inf if comparator is np.greater else np.inf
+    interval_y = np.where(inside, y_data, fill)
+    extremum_index = interval_y.argmax(axis=1) if comparator is np.greater else interval_y.argmin(axis=1)
+
+    # rows without local extremum keep the global maximum as find_local_extremum does
+    return np.where(candidates.any(axis=1), extremum_index, filter_index)
+
+
+def _relative_extremum_mask(y_data, comparator, order):
+    """ Same points as scipy.signal.argrelextrema(y_data, comparator, order, axis=1)
+    as a boolean mask, using sliding window extremums instead of one pass per shift """
+    from scipy.ndimage import maximum_filter1d, minimum_filter1d
+    window_filter = maximum_filter1d if comparator is np.greater else minimum_filter1d
+
+    # extremum of y[i-order .. i-1] and of y[i+1 .. i+order], edges repeated like argrelextrema clip mode
+    until = window_filter(y_data, size=order, axis=1, mode='nearest', origin=(order-1)//2)
+    since = window_filter(y_data, size=order, axis=1, mode='nearest', origin=-(order//2))
+    before = np.concatenate([y_data[:, :1], until[:, :-1]], axis=1)
+    after = np.concatenate([since[:, 1:], y_data[:, -1:]], axis=1)
+
+    return comparator(y_data, before) & comparator(y_data, after)
+
+
+def _find_bandwidth_batch(x_data, y_data, level, extremum_index, interp):
+    """ find_bandwidth for all the rows of y_data around extremum_index.
+    Returns the left and right (x, y) arrays and the indexes of the points
+    reached on each side. """
+    n_traces, n_points = y_data.shape
+    rows = np.arange(n_traces)
+    index = np.arange(n_points)
+    extremum_y = y_data[rows, extremum_index]
+    target_y = extremum_y + level
+
+    if level == 0 or n_points == 1:
+        point = (x_data[extremum_index], extremum_y)
+        return point, point, extremum_index, extremum_index
+
+    reached = y_data <= target_y[:, None] if level < 0 else y_data >= target_y[:, None]
+    left = np.where(reached & (index <= extremum_index[:, None]), index, -1).max(axis=1)
+    right = np.where(reached & (index >= extremum_index[:, None]), index, n_points).min(axis=1)
+
+    sides = []
+    for side, neighbour, end in ((left, left + 1, 0), (right, right - 1, n_points - 1)):
+        found = (side >= 0) & (side < n_points)
+        side = np.where(found, side, end)
+        x_side, y_side = x_data[side], y_data[rows, side]
+        if interp:
+            neighbour = np.clip(neighbour, 0, n_points - 1)
+            crossing = found & (side != extremum_index)
+            x_next, y_next = x_data[neighbour], y_data[rows, neighbour]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_interp = x_side + (target_y - y_side) * (x_next - x_side) / (y_next - y_side)
+            x_side = np.where(crossing, x_interp, x_side)
+            y_side = np.where(crossing, target_y, y_side)
+        sides.append(((x_side, y_side), side))
+
+    (bandwidth_left, left), (bandwidth_right, right) = sides
+    return bandwidth_left, bandwidth_right, left, right
+
+
+def find_peaks_table(x_data, y_data, level=-3, comparator=np.greater, prominence=None) -> pd.DataFrame:
+    """ Find every extremum of y_data at once (maximums for np.greater, minimums
+    for np.less) and return a table with, for each, its x and y, its depth
+    (prominence) and its bandwidth at abs(level) from the extremum.
+    prominence is the minimum depth of the extremums kept, abs(level) by default
+    since a shallower one has no bandwidth at this level. """
+    from scipy.signal import find_peaks, peak_prominences, peak_widths
+
+    if comparator is True:
+       comparator = np.greater
+    elif comparator is False:
+       comparator = np.less
+    if comparator is not np.greater and comparator is not np.less:
+        raise TypeError(f"Comparator must be of type np.greater or np.less or bool. Given {comparator} of type {type(comparator)}")
+
+    x_data, y_data = np.asarray(x_data, dtype=float), np.asarray(y_data, dtype=float)
+    if np.all(x_data[:-1] >= x_data[1:]):  # change decreasing order to increasing
+        x_data = x_data[::-1]
+        y_data = y_data[::-1]
+    assert np.all(x_data[:-1] <= x_data[1:]), "x axis is not sorted"
+
+    drop = abs(float(level))
+    signal = y_data if comparator is np.greater else -y_data
+    peaks = find_peaks(signal, prominence=drop if prominence is None else prominence)[0]
+    prominences, left_bases, right_bases = peak_prominences(signal, peaks)
+    # widths at drop below each extremum instead of at a fraction of its prominence
+    left_ips, right_ips = peak_widths(signal, peaks, rel_height=1,
+                                      prominence_data=(np.full(len(peaks), drop), left_bases, right_bases))[2:]
+
+    index = np.arange(len(x_data))
+    x_left, x_right = np.interp(left_ips, index, x_data), np.interp(right_ips, index, x_data)
+    return pd.DataFrame({"x": x_data[peaks], "y": y_data[peaks], "depth": prominences,
+                         "x_left": x_left, "x_right": x_right, "width": x_right - x_left})
+
+
 def find_local_extremum(x_data, y_data, target_x, level, order, comparator=np.greater):
 
     """ Find local extremum with closest x value to target_x.
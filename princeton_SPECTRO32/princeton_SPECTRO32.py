@@ -7,9 +7,16 @@ Supported instruments (identified):
 """
 
 import os
+import sys
 import time
 from numpy import savetxt,ndarray
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace_rows
+
 category = 'Optical Spectrum Analyzer (OSA)'
 
 
@@ -27,7 +34,8 @@ class Driver():
         self.write(f'EXPTIME={exposure}')
         
     def get_data(self):
-        self.data = eval(self.query('DATA?'))
+        self.data = parse_trace_rows(self.query('DATA?'))  # one row per frame
+        return self.data
     def get_exposure(self):
         return float(self.query('EXPTIME?'))
     def get_nb_frames(self):
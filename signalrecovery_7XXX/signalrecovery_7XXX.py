@@ -7,8 +7,16 @@ Supported instruments (identified):
 - signal recovery 7280 (VISA only)
 """
 
+import os
+import sys
 import time
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 class Driver():
 
     def __init__(self):
@@ -55,10 +63,7 @@ class Driver():
 ############################## Connections classes ##############################
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::2::INSTR', **kwargs):
-        import visa
-        
-        rm = visa.ResourceManager()
-        self.controller = rm.open_resource(address)
+        self.controller = open_resource(address)
         Driver.__init__(self)
 
     def close(self):
@@ -3,10 +3,18 @@ Driver for the SRS SR810 and SR830 lockin amplifiers
 Mainly derived from pymeasure - limited function set implemented so far
 """
 
+import os
+import sys
 import numpy as np
 import time
 import re
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.visa_pool import open_resource
+
 category = 'Lock-in amplifier'                 
 
 
@@ -339,9 +347,7 @@ class Driver():
 
 class Driver_VISA(Driver):
     def __init__(self, address='GPIB0::9::INSTR'):
-        import pyvisa as visa
-        rm = visa.ResourceManager()
-        self.inst = rm.open_resource(address)
+        self.inst = open_resource(address)
         Driver.__init__(self)
         
     def query(self, command):
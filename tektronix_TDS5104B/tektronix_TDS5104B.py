@@ -7,9 +7,17 @@ Supported instruments (identified):
 """
 
 import os
+import sys
 import time
 from numpy import frombuffer,int8,ndarray
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ieee_block import block_payload
+from driver_tools.async_transport import AsyncConnection, AsyncVXI11Transport
+
 
 class Driver():
     
@@ -35,7 +43,7 @@ class Driver():
         if channels == []: channels = list(range(1,self.nb_channels+1))
         for i in channels:
             time.sleep(0.1)
-            getattr(self,f'channel{i}').get_data_raw()
+            getattr(self,f'channel{i}')._get_data_block()
             getattr(self,f'channel{i}').get_log_data()
         self.run()
         
@@ -77,13 +85,19 @@ class Driver_VXI11(Driver):
         self.write(command)
         return self.read(nbytes)
     def read_raw(self):
-        self.inst.read_raw()
+        return self.inst.read_raw()
     def read(self,nbytes=100000000):
-        self.inst.read(nbytes)
+        return self.inst.read(nbytes)
     def write(self,cmd):
         self.inst.write(cmd)
     def close(self):
         self.inst.close()
+
+class Driver_ASYNC_VXI11(AsyncConnection, Driver):
+    """Driver_VXI11 run on the shared asyncio loop: awrite/aread/aquery can be awaited to poll many instruments concurrently"""
+    def __init__(self, address='192.168.0.8', **kwargs):
+        AsyncConnection.__init__(self, AsyncVXI11Transport(address))
+        Driver.__init__(self, **kwargs)
 ############################## Connections classes ##############################
 #################################################################################
 
@@ -95,21 +109,23 @@ class Channel():
         self.autoscale = False
     
     
-    def get_data_raw(self):
+    def _get_data_block(self):
+        """Query the trace and return a zero-copy view on the block payload"""
         self.dev.write(f'DAT:SOU CH{self.channel}')
         self.dev.write('DAT:ENC FAS')
         self.dev.write('WFMO:BYT_Nr 1')
         self.dev.write('CURV?')
-        self.data_raw = self.dev.read_raw()
-        self.data_raw = self.data_raw[7:-1]
+        self.data_raw = block_payload(self.dev.read_raw())
         return self.data_raw
+    def get_data_raw(self):
+        return bytes(self._get_data_block())
     def get_log_data(self):
         self.dev.write(f'DAT:SOU CH{self.channel}')
         self.dev.write('WFMO?')
         self.log_data = self.dev.read()
         return self.log_data     
     def get_data(self):
-        return frombuffer(self.get_data_raw(),int8)
+        return frombuffer(self._get_data_block(),int8)
         
     def save_data_raw(self,filename,FORCE=False):
         temp_filename = f'{filename}_TDS5104BCH{self.channel}'
@@ -11,6 +11,8 @@ from typing import Tuple, List, Union
 import sys
 import os
 import ctypes as ct
+import queue
+import threading
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 
@@ -30,6 +32,9 @@ category = 'All-band Optical Component Tester'
 
 CONNECTION_ERROR = "Error during the connection to the CT400"
 
+# Number of decimals kept in scan data, matching the detector precision
+DATA_DECIMALS = {"L": 3, "O": 2, "1": 2, "2": 2, "3": 2, "4": 2}
+
 # needed for plotter import (only needed if used outside of autolab)
 if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
     sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -401,6 +406,22 @@ def write_xml(config: dict, configpath: str):
     except FileNotFoundError:
         pass
 
+def round_decimals(values: np.ndarray, decimals: int) -> np.ndarray:
+    """ Return the same floats as float('%.{decimals}f' % value) for each
+    value, without going through strings """
+    scale = 10.**decimals
+    values = np.asarray(values, dtype=float)
+    with np.errstate(over='ignore', invalid='ignore'):
+        scaled = values * scale
+        rounded = np.rint(scaled) / scale
+        # the product can be rounded across a .5 (or overflow): use the exact decimal rounding of the string format there
+        ambiguous = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) <= 4 * np.spacing(np.abs(scaled))
+        ambiguous |= np.isinf(scaled) & np.isfinite(values)
+    for index in np.flatnonzero(ambiguous):
+        rounded[index] = float(f"{values[index]:.{decimals}f}")
+    return rounded
+
+
 # config = read_xml(r'C:\Users\Public\Documents\Yenista Optics\CT400\Config\CT400.config.xml')
 # write_xml(config, r'C:\Users\Public\Documents\Yenista Optics\CT400\Config\CT400.config.xml')
 # %%
@@ -454,19 +475,22 @@ class Laser:
 
     def _init_laser(self):
         if self.model == "CT440":
-            self.controller.set_laser(self.uiHandle, self.NUM, self._connected,
+            sent = self.dev._dll_call('set_laser', self.NUM, self._connected,
                                       self._GPIBID, self._GPIBAdress,  # for set_laser2 use this: str.encode(f"GPIB{self._GPIBGPIBID}::{self._GPIBAdress}"),  #
                                       self._laser_model,
                                       ct.c_double(self._low_wavelength),
                                       ct.c_double(self._high_wavelength),
-                                      self._speed)
+                                      self._speed, slot=f'set_laser{self.NUM}')
         else:
-            self.controller.set_laser(self.uiHandle, self.NUM, self._connected,
+            sent = self.dev._dll_call('set_laser', self.NUM, self._connected,
                                       self._GPIBAdress,
                                       self._laser_model,
                                       ct.c_double(self._low_wavelength),
                                       ct.c_double(self._high_wavelength),
-                                      self._speed)
+                                      self._speed, slot=f'set_laser{self.NUM}')
+        if sent:  # the scan configuration uses the lasers one
+            with self.dev._dll_calls_lock:
+                self.dev._dll_calls.pop('set_scan', None)
 
     def get_model(self) -> Tuple[List[str], int]:
         return self._model_tuple
@@ -649,6 +673,8 @@ class Scan:
     uiHandle: int
     _NBR_INPUT: int
 
+    MAX_PENDING_SWEEPS = 100  # do_sweeps waits for sweeps to be read before starting more
+
     def __init__(self, dev):  # dev is the Driver instance
         self.dev = dev
         self.model = self.dev.model
@@ -657,9 +683,17 @@ class Scan:
         self.uiHandle = self.dev.uiHandle
         self._NBR_INPUT = self.dev._NBR_INPUT
         self._interpolate = True
+        self._round_data = True
+        self._buffers = {}  # numpy arrays filled by the DLL, by data key
         self.scan_running = False
+        self.sweeps = queue.Queue()  # sweeps done by do_sweeps, or the exception that stopped them
+        self._sweeps_thread = None
+        self._stop_sweeps = threading.Event()
+        self._nb_sweeps = 0
+        self._nb_sweeps_done = 0
 
         self.tcError = ct.create_string_buffer(1024)
+        self.tcProgressError = ct.create_string_buffer(1024)  # get_progress runs while a thread waits with tcError
 
         self._init_variables()
 
@@ -689,10 +723,15 @@ class Scan:
         self.set_scan(self._power_scan, self._low_wavelength_scan, self._high_wavelength_scan)
         self.set_res(self._res)
 
+    def _check_sweeps_stopped(self):
+        """ The scan settings are used by the sweeps thread: they can't change during do_sweeps """
+        assert not self.get_sweeps_running(), "Can't change the scan settings while sweeps are running, use stop_sweeps first"
+
     def get_low_wavelength_scan(self) -> float:
         return self._low_wavelength_scan
 
     def set_low_wavelength_scan(self, value: float):
+        self._check_sweeps_stopped()
         self._low_wavelength_scan = float(value)
         self.set_scan(self._power_scan, self._low_wavelength_scan, self._high_wavelength_scan)
 
@@ -700,6 +739,7 @@ class Scan:
         return self._high_wavelength_scan
 
     def set_high_wavelength_scan(self, value: float):
+        self._check_sweeps_stopped()
         self._high_wavelength_scan = float(value)
         self.set_scan(self._power_scan, self._low_wavelength_scan, self._high_wavelength_scan)
 
@@ -710,41 +750,49 @@ class Scan:
                 res = self._res
             PI = ct.POINTER(ct.c_int)
             res_pointer = PI(ct.c_int(res))
-            self.controller.set_scan(
-                    self.uiHandle,
-                    ct.c_double(power),
-                    ct.c_double(low_wl),
-                    ct.c_double(high_wl),
-                    res_pointer)
-            self._res = int(res_pointer.contents.value)  # CT440 can change the resolution
+            if self.dev._dll_call('set_scan',
+                                  ct.c_double(power),
+                                  ct.c_double(low_wl),
+                                  ct.c_double(high_wl),
+                                  res_pointer, key=(power, low_wl, high_wl, res)):
+                self._res = int(res_pointer.contents.value)  # CT440 can change the resolution
         else:
-            self.controller.set_scan(
-                    self.uiHandle,
-                    ct.c_double(power),
-                    ct.c_double(low_wl),
-                    ct.c_double(high_wl))
+            self.dev._dll_call('set_scan',
+                               ct.c_double(power),
+                               ct.c_double(low_wl),
+                               ct.c_double(high_wl))
 
     def get_res(self) -> int:
         return self._res
 
     def set_res(self, value: int):
+        self._check_sweeps_stopped()
         if self.model == "CT440":
             self._res = int(value)
             self.set_scan(self._power_scan, self._low_wavelength_scan, self._high_wavelength_scan)
         else:
             self._res = int(value)
-            self.controller.set_resolution(self.uiHandle, self._res)
+            self.dev._dll_call('set_resolution', self._res)
 
     def get_interpolate(self) -> bool:
         return self._interpolate
 
     def set_interpolate(self, value: bool):
+        self._check_sweeps_stopped()
         self._interpolate = bool(int(float(value)))
 
+    def get_round_data(self) -> bool:
+        return self._round_data
+
+    def set_round_data(self, value: bool):
+        self._check_sweeps_stopped()
+        self._round_data = bool(int(float(value)))
+
     def get_power_scan(self) -> float:
         return self._power_scan
 
     def set_power_scan(self, value: float):
+        self._check_sweeps_stopped()
         self._power_scan = float(value)
         self.set_scan(self._power_scan, self._low_wavelength_scan, self._high_wavelength_scan)
 
@@ -752,79 +800,158 @@ class Scan:
         return self._detector2_state
 
     def set_detector2_state(self, value: bool):
+        self._check_sweeps_stopped()
         self._detector2_state = bool(int(float(value)))
 
     def get_detector3_state(self) -> bool:
         return self._detector3_state
 
     def set_detector3_state(self, value: bool):
+        self._check_sweeps_stopped()
         self._detector3_state = bool(int(float(value)))
 
     def get_detector4_state(self) -> bool:
         return self._detector4_state
 
     def set_detector4_state(self, value: bool):
+        self._check_sweeps_stopped()
         self._detector4_state = bool(int(float(value)))
 
-    def do_sweep(self):
+    def _prepare_sweep(self):
         for i in range(1,4+1):
             laser = getattr(self.dev, f"laser{i}", None)
             if laser is not None and laser._connected:
                 laser._state = ENABLE
 
-        self.scan_running = True
-        self.controller.set_detector_array(self.uiHandle,
-                                           self._detector2_state,
-                                           self._detector3_state,
-                                           self._detector4_state,
-                                           DISABLE)  # eExt
+        # Settings unchanged since they were last sent are not sent again (see Driver._dll_call)
+        self.dev._dll_call('set_detector_array',
+                           self._detector2_state,
+                           self._detector3_state,
+                           self._detector4_state,
+                           DISABLE)  # eExt
 
-        self.controller.set_bnc(self.uiHandle, DISABLE, ct.c_double(0.0), ct.c_double(0.0), Unit_mW)
+        self.dev._dll_call('set_bnc', DISABLE, ct.c_double(0.0), ct.c_double(0.0), Unit_mW)
 
         self.set_scan(self._power_scan, self._low_wavelength_scan, self._high_wavelength_scan)
 
+    def _start_scan(self):
+        self.scan_running = True
         if self.model == "CT440":
             self.controller.scan_start(self.uiHandle, DISABLE)  # ENABLE seems to be used for calibration only
         else:
             self.controller.scan_start(self.uiHandle)
 
+    def _wait_scan(self):
         iErrorID = self.controller.scan_wait_end(self.uiHandle, self.tcError)
 
         self.scan_running = False
         assert iErrorID == 0, 'Error during sweep: '+repr(self.tcError.value)[2:-1]
 
+    def do_sweep(self):
+        assert not self.get_sweeps_running(), "Can't start a sweep while sweeps are running"
+        self._prepare_sweep()
+        self._start_scan()
+        self._wait_scan()
         self._get_data_sweep()
 
-    def _get_data_sweep(self):
+    def do_sweeps(self, value: int):
+        """ Start value sweeps (0 until stop_sweeps) in a background thread and
+        return immediately. The next scan is started as soon as the data of
+        the previous one are read, then the previous data are published and
+        queued for get_next_sweep while the laser sweeps. """
+        assert not self.get_sweeps_running(), "Sweeps are already running"
+        self._nb_sweeps = int(value)
+        self._nb_sweeps_done = 0
+        self.sweeps = queue.Queue()  # don't return the sweeps or the error left by a previous run
+        self._stop_sweeps.clear()
+        self._sweeps_thread = threading.Thread(target=self._sweeps_worker, name='CT400-sweeps', daemon=True)
+        self._sweeps_thread.start()
+
+    def _sweeps_worker(self):
+        try:
+            self._prepare_sweep()
+            self._start_scan()
+            while True:
+                self._wait_scan()
+                df_res = self._read_sweep()
+                self._nb_sweeps_done += 1
+
+                more = self._nb_sweeps == 0 or self._nb_sweeps_done < self._nb_sweeps
+                while more and self.sweeps.qsize() >= self.MAX_PENDING_SWEEPS:  # wait for the sweeps to be read
+                    more = not self._stop_sweeps.wait(0.1)
+                more = more and not self._stop_sweeps.is_set()
+                if more:
+                    self._start_scan()
+                self._publish_sweep(df_res)
+                self.sweeps.put(df_res)
+                if not more:
+                    break
+        except Exception as e:
+            self.scan_running = False
+            self.dev._error_msg = str(e)
+            self.sweeps.put(e)
+
+    def stop_sweeps(self):
+        """ Stop the sweeps started by do_sweeps after the scan in progress """
+        self._stop_sweeps.set()
+        if self._sweeps_thread is not None:
+            self._sweeps_thread.join()
+
+    def get_sweeps_running(self) -> bool:
+        return self._sweeps_thread is not None and self._sweeps_thread.is_alive()
+
+    def get_nb_sweeps_done(self) -> int:
+        return self._nb_sweeps_done
+
+    def get_nb_sweeps_pending(self) -> int:
+        return self.sweeps.qsize()
+
+    def get_next_sweep(self) -> pd.DataFrame:
+        """ Return the oldest sweep done by do_sweeps not returned yet, waiting
+        for it if sweeps are running. Empty DataFrame if there is none. """
+        while True:
+            running = self.get_sweeps_running()
+            try:
+                result = self.sweeps.get(timeout=0.1) if running else self.sweeps.get_nowait()
+                break
+            except queue.Empty:
+                if not running:
+                    return pd.DataFrame()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_progress(self) -> int:
+        """ Progress of the scan in progress reported by the CT440 in %, -1 if not available """
+        if self.model != "CT440" or not self.scan_running:
+            return -1
+        PI = ct.c_int32 * 1
+        (progress, status, points) = (PI(), PI(), PI())
+        self.controller.scan_get_progress(self.uiHandle, self._input_source, progress, status, points, self.tcProgressError)
+        return int(progress[0])
+
+    def _get_buffer(self, key: str, nb_points: int) -> np.ndarray:
+        """ Return a view on nb_points of the array preallocated for key, only
+        reallocated if a scan has more points than the array """
+        buffer = self._buffers.get(key)
+        if buffer is None or len(buffer) < nb_points:
+            nb_points_scan = int((self._high_wavelength_scan - self._low_wavelength_scan) * 1000 / max(self._res, 1)) + 1
+            buffer = np.empty(max(nb_points, nb_points_scan), dtype=np.float64)
+            self._buffers[key] = buffer
+        return buffer[:nb_points]
+
+    def _read_array(self, key: str, nb_points: int, function, *args) -> np.ndarray:
+        """ Have the DLL function write nb_points directly in the buffer of key """
+        array = self._get_buffer(key, nb_points)
+        function(self.uiHandle, *args, array.ctypes.data_as(ct.POINTER(ct.c_double)), nb_points)
+        return array
+
+    def _read_sweep(self) -> pd.DataFrame:
         if self._interpolate:
-            iPointsNumberResampled = self.controller.get_nb_datapoints_resampled(self.uiHandle)
-            DataArraySizeResampled = ct.c_double * iPointsNumberResampled
-            (dWavelengthResampled, dPowerResampled, dDetector1Resampled) = (DataArraySizeResampled(), DataArraySizeResampled(), DataArraySizeResampled())
-
-            self.controller.scan_get_wavelength_resampled_array(self.uiHandle, dWavelengthResampled, iPointsNumberResampled)
-            self.controller.scan_get_power_resampled_array(self.uiHandle, dPowerResampled, iPointsNumberResampled)
-            self.controller.scan_get_detector_resampled_array(self.uiHandle, DE_1, dDetector1Resampled, iPointsNumberResampled)
-
-            results_interp = {"L": np.array(dWavelengthResampled, dtype=float),
-                              "O": np.array(dPowerResampled, dtype=float),
-                              "1": np.array(dDetector1Resampled, dtype=float)}
-
-            if self._detector2_state:
-                dDetector2Resampled = DataArraySizeResampled()
-                self.controller.scan_get_detector_resampled_array(self.uiHandle, DE_2, dDetector2Resampled, iPointsNumberResampled)
-                results_interp["2"] = np.array(dDetector2Resampled, dtype=float)
-
-            if self._detector3_state:
-                dDetector3Resampled = DataArraySizeResampled()
-                self.controller.scan_get_detector_resampled_array(self.uiHandle, DE_3, dDetector3Resampled, iPointsNumberResampled)
-                results_interp["3"] = np.array(dDetector3Resampled, dtype=float)
-
-            if self._detector4_state:
-                dDetector4Resampled = DataArraySizeResampled()
-                self.controller.scan_get_detector_resampled_array(self.uiHandle, DE_4, dDetector4Resampled, iPointsNumberResampled)
-                results_interp["4"] = np.array(dDetector4Resampled, dtype=float)
-
-            results = results_interp
+            iPointsNumber = self.controller.get_nb_datapoints_resampled(self.uiHandle)
+            get_wavelength_array = self.controller.scan_get_wavelength_resampled_array
+            get_power_array = self.controller.scan_get_power_resampled_array
+            get_detector_array = self.controller.scan_get_detector_resampled_array
         else:
             if self.model == "CT440":
                 DataPointSize = ct.c_int * 1
@@ -833,35 +960,18 @@ class Scan:
                 iPointsNumber = iDataPoints[0]
             else:
                 iPointsNumber = self.controller.get_nb_datapoints(self.uiHandle)
-            DataArraySize = ct.c_double * iPointsNumber
-            (dWavelengthSync, dPowerSync, dDetector1Sync) = (DataArraySize(), DataArraySize(), DataArraySize())
-
-            self.controller.scan_get_wavelength_sync_array(self.uiHandle, dWavelengthSync, iPointsNumber)
-            self.controller.scan_get_power_sync_array(self.uiHandle, dPowerSync, iPointsNumber)
-            self.controller.scan_get_detector_array(self.uiHandle, DE_1, dDetector1Sync, iPointsNumber)
-
-            results_raw = {"L": np.array(dWavelengthSync, dtype=float),
-                           "O": np.array(dPowerSync, dtype=float),
-                           "1": np.array(dDetector1Sync, dtype=float),
-                           }
-
-            if self._detector2_state:
-                dDetector2Sync = DataArraySize()
-                self.controller.scan_get_detector_array(self.uiHandle, DE_2, dDetector2Sync, iPointsNumber)
-                results_raw["2"] = np.array(dDetector2Sync, dtype=float)
-
-            if self._detector3_state:
-                dDetector3Sync = DataArraySize()
-                self.controller.scan_get_detector_array(self.uiHandle, DE_3, dDetector3Sync, iPointsNumber)
-                results_raw["3"] = np.array(dDetector3Sync, dtype=float)
-
-            if self._detector4_state:
-                dDetector4Sync = DataArraySize()
+            get_wavelength_array = self.controller.scan_get_wavelength_sync_array
+            get_power_array = self.controller.scan_get_power_sync_array
+            get_detector_array = self.controller.scan_get_detector_array
 
-                self.controller.scan_get_detector_array(self.uiHandle, DE_4, dDetector4Sync, iPointsNumber)
-                results_raw["4"] = np.array(dDetector4Sync, dtype=float)
+        # The DLL fills numpy arrays reused from sweep to sweep: no allocation nor copy
+        results = {"L": self._read_array("L", iPointsNumber, get_wavelength_array),
+                   "O": self._read_array("O", iPointsNumber, get_power_array),
+                   "1": self._read_array("1", iPointsNumber, get_detector_array, DE_1)}
 
-            results = results_raw
+        for (i, detector) in ((2, DE_2), (3, DE_3), (4, DE_4)):
+            if getattr(self, f"_detector{i}_state"):
+                results[str(i)] = self._read_array(str(i), iPointsNumber, get_detector_array, detector)
 
         # dWavelengthSync = np.linspace(1510, 1610, 1001)  # used to test without the ct400
         # dPowerSync = np.random.random(dWavelengthSync.shape)
@@ -878,27 +988,24 @@ class Scan:
         #                }
         # results = results_test
 
-        # Change rounding format to match detector precision
-        df_res = pd.DataFrame(results)
-        df_res['L'] = df_res['L'].map(lambda x: '%1.3f' % x)  # Set nbr of digit to save but change datatype to object: float -> str
-        df_res['O'] = df_res['O'].map(lambda x: '%1.2f' % x)
-        df_res['1'] = df_res['1'].map(lambda x: '%1.2f' % x)
-        if df_res.get("2") is not None:
-            df_res['2'] = df_res['2'].map(lambda x: '%1.2f' % x)
-        if df_res.get("3") is not None:
-            df_res['3'] = df_res['3'].map(lambda x: '%1.2f' % x)
-        if df_res.get("4") is not None:
-            df_res['4'] = df_res['4'].map(lambda x: '%1.2f' % x)
+        # Change rounding format to match detector precision (new arrays), or keep full
+        # float64 values copied once out of the scan buffers, overwritten by the next sweep
+        if self._round_data:
+            results = {key: round_decimals(value, DATA_DECIMALS[key]) for key, value in results.items()}
+            return pd.DataFrame(results, copy=False)
+        return pd.DataFrame(results, copy=True)
 
-        df_res = df_res.apply(pd.to_numeric)  # OPTIMIZE: good to have float for plotting but bad rounding for saving data. could have get_data_str() for saving and get_data() for plotting
+    def _get_data_sweep(self):
+        self._publish_sweep(self._read_sweep())
 
+    def _publish_sweep(self, df_res: pd.DataFrame):
         self.dev.data = df_res
 
         if hasattr(self.dev, "interface"):
             self.dev.interface.set_data(df_res)
 
     def get_data(self) -> pd.DataFrame:
-        return pd.DataFrame(self.dev.data)
+        return self.dev.data.copy()  # not a view on the scan buffers
 
     def get_input_source(self) -> int:
         return self._input_source
@@ -952,6 +1059,49 @@ class Scan:
                        'do': self.do_sweep,
                        'help': 'Start the scan'})
 
+        config.append({'element': 'action',
+                       'name': 'sweeps',
+                       'do': self.do_sweeps,
+                       'param_type': int,
+                       'help': 'Start this number of scans (0 until stop_sweeps) in background, each one starting as soon as the previous data are read. Get them with next_sweep'})
+
+        config.append({'element': 'action',
+                       'name': 'stop_sweeps',
+                       'do': self.stop_sweeps,
+                       'help': 'Stop the background scans after the one in progress'})
+
+        config.append({'element': 'variable',
+                       'name': 'next_sweep',
+                       'type': pd.DataFrame,
+                       'read': self.get_next_sweep,
+                       'help': 'Return the oldest background scan not read yet, waiting for it if scans are running'})
+
+        config.append({'element': 'variable',
+                       'name': 'sweeps_running',
+                       'type': bool,
+                       'read': self.get_sweeps_running,
+                       'help': 'Return True while background scans are running'})
+
+        config.append({'element': 'variable',
+                       'name': 'nb_sweeps_done',
+                       'type': int,
+                       'read': self.get_nb_sweeps_done,
+                       'help': 'Return the number of background scans done'})
+
+        config.append({'element': 'variable',
+                       'name': 'nb_sweeps_pending',
+                       'type': int,
+                       'read': self.get_nb_sweeps_pending,
+                       'help': 'Return the number of background scans done but not read with next_sweep'})
+
+        if self.model == "CT440":
+            config.append({'element': 'variable',
+                           'name': 'progress',
+                           'unit': '%',
+                           'type': int,
+                           'read': self.get_progress,
+                           'help': 'Return the progress of the scan in progress, -1 if no scan'})
+
         config.append({'element': 'variable',
                        'name': 'data',
                        'type': pd.DataFrame,
@@ -966,6 +1116,14 @@ class Scan:
                        'write': self.set_interpolate,
                        'help': 'Set if want interpolated or raw scan data'})
 
+        config.append({'element': 'variable',
+                       'name': 'round_data',
+                       'type': bool,
+                       'read_init': True,
+                       'read': self.get_round_data,
+                       'write': self.set_round_data,
+                       'help': 'Set if scan data are rounded to the detector precision (0.001 nm, 0.01 dB) or kept with full float precision'})
+
         config.append({'element': 'variable',
                        'name': 'detector2',
                        'type': bool,
@@ -1114,6 +1272,10 @@ class Driver():
 
         self.data = pd.DataFrame()
 
+        self._dll_calls = {}  # arguments of the last configuration calls sent to the DLL
+        self._dll_calls_lock = threading.RLock()  # do_sweeps configures the scan from its own thread
+        self._nb_dll_calls_skipped = 0
+
         self.detectors = Detectors(self)
 
         self.nl = len(self.config['address'])
@@ -1133,6 +1295,30 @@ class Driver():
     def get_error_msg(self) -> str:
         return self._error_msg
 
+    def _dll_call(self, name: str, *args, key: tuple = None, slot: str = None) -> bool:
+        """ Call controller.name(uiHandle, *args) unless the last call of slot
+        (name by default) had the same arguments (or key if given). ctypes
+        arguments are compared by value. Returns True if the call was made. """
+        slot = name if slot is None else slot
+        if key is None:
+            key = tuple(arg.value if isinstance(arg, ct._SimpleCData) else arg for arg in args)
+        with self._dll_calls_lock:
+            if self._dll_calls.get(slot) == key:
+                self._nb_dll_calls_skipped += 1
+                return False
+            self._dll_calls.pop(slot, None)  # unknown state if the call fails
+            getattr(self.controller, name)(self.uiHandle, *args)
+            self._dll_calls[slot] = key
+            return True
+
+    def get_nb_dll_calls_skipped(self) -> int:
+        return self._nb_dll_calls_skipped
+
+    def reset_dll_calls(self):
+        """ Send all the configuration again at the next sweep, e.g. after the CT400 was reset """
+        with self._dll_calls_lock:
+            self._dll_calls = {}
+
     def get_config(self) -> dict:
 
         get_laser_attr = lambda attr: [getattr(self, f"laser{i}").__dict__[attr]
@@ -1165,6 +1351,17 @@ class Driver():
                       'read': self.get_error_msg,
                       'help': 'Information on last error uncounter'})
 
+        model.append({'element': 'variable',
+                      'name': 'nb_dll_calls_skipped',
+                      'type': int,
+                      'read': self.get_nb_dll_calls_skipped,
+                      'help': 'Number of configuration calls not sent to the DLL because the setting was unchanged'})
+
+        model.append({'element': 'action',
+                      'name': 'reset_dll_calls',
+                      'do': self.reset_dll_calls,
+                      'help': 'Send the whole configuration again at the next sweep'})
+
         if hasattr(self, 'interface'):
             model.append({'element': 'module',
                           'name': 'interface',
@@ -1313,6 +1510,10 @@ class Driver_DLL(Driver):
         assert self.controller.check_connected(self.uiHandle), CONNECTION_ERROR
 
     def close(self):
+        try:
+            self.scan.stop_sweeps()
+        except Exception as e:
+            print(f"Warning, {self.model} sweeps didn't stop properly: {e}", file=sys.stderr)
         try:
             if self.controller:
                 self.controller.close(self.uiHandle)
@@ -7,16 +7,27 @@ Supported instruments (identified):
 """
 
 import os
+import sys
 import time
-from numpy import savetxt,linspace
+from numpy import savetxt,linspace,frombuffer
 import pandas
 
+# needed for driver_tools import (only needed if used outside of autolab)
+if os.path.dirname(os.path.dirname(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from driver_tools.ascii_trace import parse_trace
+from driver_tools.ieee_block import BlockReader
+from driver_tools.async_transport import AsyncConnection, AsyncSocketTransport
+
 category = 'Optical Spectrum Analyzer (OSA)'
 
 
 class Driver():
     
-    def __init__(self):
+    def __init__(self,data_format='REAL'):
+        
+        self.set_data_format(data_format)
         
         for i in ['A','B','C','D','E','F','G']:
             setattr(self,f'trace{i}',Traces(self,i))
@@ -37,6 +48,15 @@ class Driver():
         for i in traces:
             getattr(self,f'trace{i}').save_data(filename=filename,FORCE=FORCE)
         
+    def set_data_format(self,value):
+        """Argument must be REAL (binary float64 transfer) or ASCII"""
+        value = str(value).upper()
+        assert value in ('REAL','ASCII'), f"Data format must be REAL or ASCII, not {value}"
+        self.data_format = value
+        self.write(':FORMAT:DATA REAL,64' if value == 'REAL' else ':FORMAT:DATA ASCII')
+    def get_data_format(self):
+        return self.data_format
+        
     ### Trigger functions
     def single(self):
         """Trigger a single sweep"""
@@ -51,6 +71,7 @@ class Driver():
         for i in ['A','B','C','D','E','F','G']:
             model.append({'element':'module','name':f'line{i}','object':getattr(self,f'trace{i}'), 'help':'Traces'})
         model.append({'element':'variable','name':'is_stopped','read':self.is_scope_stopped, 'type':bool,'help':'Query whether scope is stopped'})
+        model.append({'element':'variable','name':'data_format','read':self.get_data_format,'write':self.set_data_format,'type':str,'help':'Trace transfer format: REAL (binary, default) or ASCII'})
         model.append({'element':'action','name':'single','do':self.single,'help':'Set single mode'})
         return model
 
@@ -63,6 +84,7 @@ class Driver_SOCKET(Driver):
         
         self.sock=socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.connect((address, int(port)))
+        self.block_reader = BlockReader(self.sock.recv_into)
         self.write('OPEN "anonymous"')
         ans = self.read(1024)
         if not ans=='AUTHENTICATE CRAM-MD5.':
@@ -83,12 +105,26 @@ class Driver_SOCKET(Driver):
             msg=msg+self.sock.recv(length).decode()
         msg = msg[:-2]
         return msg.strip('\r\n')
+    def read_block(self):
+        """Returns a view on the payload of a binary block answer, overwritten by the next call"""
+        return self.block_reader.read(terminator=b'\r\n')
     def query(self,msg,length=100000):
         """Sends question and returns answer"""
         self.write(msg)
         return(self.read(length))
     def close(self):
         self.sock.close()
+
+class Driver_ASYNC_SOCKET(AsyncConnection, Driver):
+    """Driver_SOCKET run on the shared asyncio loop: awrite/aread/aquery can be awaited to poll many instruments concurrently"""
+    def __init__(self, address='192.168.0.9', port=10001, **kwargs):
+        AsyncConnection.__init__(self, AsyncSocketTransport(address,port,read_termination=b'\r\n'))
+        if not self.query('OPEN "anonymous"')=='AUTHENTICATE CRAM-MD5.':
+            print("problem with authentication")
+        if not self.query(" ")=='ready':
+            print("problem with authentication")
+
+        Driver.__init__(self)
 ############################## Connections classes ##############################
 #################################################################################
 
@@ -98,12 +134,15 @@ class Traces():
         self.trace     = str(trace)
         self.dev       = dev
         self.data_dict = {}
+        self._axis_settings = None
         
     def get_data(self):
-        self.data        = self.dev.query(f":TRAC:DATA:Y? TR{self.trace}").split(',')
+        if self.dev.data_format == 'REAL':
+            self.dev.write(f":TRAC:DATA:Y? TR{self.trace}")
+            self.data = frombuffer(self.dev.read_block(),'<f8').copy()
+        else:
+            self.data = parse_trace(self.dev.query(f":TRAC:DATA:Y? TR{self.trace}"))
         self.frequencies = self.get_frequencies()
-        self.data        = [float(val) for val in self.data]
-        self.frequencies = [float(val) for val in self.frequencies]
         return self.frequencies,self.data
     def get_data_dataframe(self):
         frequencies,data              = self.get_data()
@@ -112,7 +151,17 @@ class Traces():
         return pandas.DataFrame(self.data_dict)
     
     def get_frequencies(self):
-        return self.dev.query(f":TRAC:DATA:X? TR{self.trace}").split(',')
+        """In REAL format, the axis is computed from the sweep span and the trace length instead of being transferred"""
+        if self.dev.data_format == 'ASCII':
+            return parse_trace(self.dev.query(f":TRAC:DATA:X? TR{self.trace}"))
+        settings = (float(self.dev.query(':SENSE:WAVELENGTH:START?')),
+                    float(self.dev.query(':SENSE:WAVELENGTH:STOP?')),
+                    len(self.data))
+        if settings != self._axis_settings:
+            self._axis_settings = settings
+            self._frequencies = linspace(*settings)
+            self._frequencies.flags.writeable = False
+        return self._frequencies
     
     def save_data(self,filename,FORCE=False):
         temp_filename = f'{filename}_AQ6370TR{self.trace}.txt'